@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Замер производительности шага симуляции для разных размеров популяции
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from simulation import create_simulation, ENGINES
+
+DEFAULT_POPULATIONS = (20, 100, 1000, 10000, 100000)
+# Плотность пищи - максимум пищи в мире; в замерах пища восполняется до максимума каждый шаг
+DEFAULT_FOOD = (80, 800, 8000)
+
+def _create(engine, population, max_food, seed, width, height):
+    """Создает симуляцию с заданной популяцией и заполненной пищей"""
+    sim = create_simulation(width, height, engine=engine, seed=seed)
+    sim.set_parameters(initial_organisms=population, food_spawn_rate=1.0, max_food=max_food)
+    sim.reset()
+    return sim
+
+def benchmark_case(engine, population, max_food, steps=20, seed=0, time_budget=10.0,
+                   width=800, height=600, measure_memory=True):
+    """Замеряет один вариант: шаги в секунду, обновления организмов в секунду и пик памяти.
+
+    Шаги выполняются, пока не сделано steps шагов или не истек time_budget секунд
+    (но не меньше одного шага). Пик памяти замеряется отдельным прогоном
+    из одного шага под tracemalloc, чтобы трассировка не искажала время.
+    """
+    sim = _create(engine, population, max_food, seed, width, height)
+
+    done = 0
+    organism_updates = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while done < steps and (done == 0 or elapsed < time_budget):
+        organism_updates += len(sim.organisms)
+        sim.update(dt=1.0)
+        done += 1
+        elapsed = time.perf_counter() - start
+
+    result = {
+        'engine': engine,
+        'population': population,
+        'max_food': max_food,
+        'seed': seed,
+        'steps': done,
+        'elapsed_seconds': elapsed,
+        'steps_per_second': done / elapsed,
+        'organism_updates_per_second': organism_updates / elapsed,
+        'final_population': len(sim.organisms),
+        'peak_memory_bytes': None,
+    }
+
+    if measure_memory:
+        del sim
+        tracemalloc.start()
+        try:
+            sim = _create(engine, population, max_food, seed, width, height)
+            sim.update(dt=1.0)
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+def environment():
+    """Сведения об окружении для сравнения замеров между машинами и коммитами"""
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'numpy': None,
+        'commit': None,
+    }
+    try:
+        import numpy
+        info['numpy'] = numpy.__version__
+    except ImportError:
+        pass
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                        text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+def run_benchmarks(engines=ENGINES, populations=DEFAULT_POPULATIONS, food=DEFAULT_FOOD,
+                   steps=20, seed=0, time_budget=10.0, measure_memory=True, report=None):
+    """Выполняет все варианты и возвращает результаты вместе с описанием окружения"""
+    results = []
+    for engine in engines:
+        for population in populations:
+            for max_food in food:
+                result = benchmark_case(engine, population, max_food, steps=steps, seed=seed,
+                                        time_budget=time_budget, measure_memory=measure_memory)
+                results.append(result)
+                if report is not None:
+                    report(result)
+    return {
+        'environment': environment(),
+        'settings': {'steps': steps, 'seed': seed, 'time_budget': time_budget},
+        'results': results,
+    }
+
+def _print_result(result):
+    """Выводит строку результата замера"""
+    memory = result['peak_memory_bytes']
+    memory = f"{memory / 2**20:8.1f} МБ" if memory is not None else "       -"
+    print(f"{result['engine']:6} популяция {result['population']:>6} пища {result['max_food']:>5}: "
+          f"{result['steps_per_second']:9.1f} шагов/с, "
+          f"{result['organism_updates_per_second']:12.0f} обновлений/с, {memory}", flush=True)
+
+def main(argv=None):
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Эволюция: замер производительности шага")
+    parser.add_argument('--engines', choices=ENGINES, nargs='+', default=list(ENGINES),
+                        help="движки для замера")
+    parser.add_argument('--populations', type=int, nargs='+', default=list(DEFAULT_POPULATIONS),
+                        help="начальные размеры популяции")
+    parser.add_argument('--food', type=int, nargs='+', default=list(DEFAULT_FOOD),
+                        help="плотности пищи (максимум пищи в мире)")
+    parser.add_argument('--steps', type=int, default=20, help="число замеряемых шагов")
+    parser.add_argument('--time-budget', type=float, default=10.0,
+                        help="ограничение времени на один вариант, с")
+    parser.add_argument('--seed', type=int, default=0, help="зерно генератора случайных чисел")
+    parser.add_argument('--no-memory', action='store_true', help="не замерять пик памяти")
+    parser.add_argument('--output', default='benchmark.json', help="файл результатов (JSON)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.engines, args.populations, args.food, steps=args.steps,
+                            seed=args.seed, time_budget=args.time_budget,
+                            measure_memory=not args.no_memory, report=_print_result)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+
+if __name__ == "__main__":
+    main()
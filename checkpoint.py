@@ -0,0 +1,226 @@
+import json
+import os
+import numpy as np
+from organism import GENE_NAMES
+from history import HISTORY_KEYS
+from population import Population
+from simulation import create_simulation
+
+# Версия формата файла сохранения
+CHECKPOINT_VERSION = 3
+
+# Сигнатура в начале файла и выравнивание массивов (в байтах)
+MAGIC = b'EVOSAVE\x00'
+ALIGNMENT = 64
+
+# Колонки пищи и их типы
+FOOD_COLUMNS = {
+    'id': np.int64,
+    'x': np.float64,
+    'y': np.float64,
+    'size': np.float64,
+    'energy': np.float64,
+    'consumed': np.bool_,
+}
+
+# Колонки организмов (одинаковы для обоих движков)
+ORGANISM_COLUMNS = tuple(Population.COLUMNS) + ('genes',)
+
+# Массивы истории генов (как в GeneHistory.get_state)
+HISTORY_ARRAYS = ('block_counts',) + tuple(
+    f'{part}_{key}' for key in HISTORY_KEYS for part in ('series', 'block_min', 'block_sum', 'block_max'))
+
+# Поля заголовка, без которых сохранение не загрузить
+STATE_FIELDS = ('engine', 'width', 'height', 'settings', 'time_step', 'generation_count',
+                'next_organism_id', 'next_food_id', 'running_stats', 'stats', 'history', 'rng')
+
+def _aligned(size):
+    """Округляет размер вверх до границы выравнивания"""
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+def save_checkpoint(simulation, path):
+    """Сохраняет полное состояние симуляции в один двоичный файл.
+
+    Файл - сигнатура, длина и JSON-заголовок, затем массивы организмов, пищи
+    и истории генов в исходном двоичном виде, каждый с выровненного смещения.
+    Заголовок хранит счетчики, статистику, параметры, состояние генераторов
+    случайных чисел, а также тип, форму и смещение каждого массива, поэтому
+    загрузка отображает массивы в память без разбора (см. read_checkpoint).
+    Файл пишется во временный и заменяет старый переименованием: массивы
+    ранее загруженного сохранения могут еще ссылаться на прежний файл.
+    """
+    columns, next_organism_id = simulation._organism_columns()
+    arrays = {f'organism_{name}': column for name, column in columns.items()}
+
+    food_sources = simulation.food_sources
+    count = len(food_sources)
+    for name, dtype in FOOD_COLUMNS.items():
+        arrays[f'food_{name}'] = np.fromiter((food[name] for food in food_sources), dtype, count)
+
+    history = simulation.gene_history.get_state()
+    for name, values in history.items():
+        if isinstance(values, list):
+            arrays[f'history_{name}'] = np.asarray(values)
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += _aligned(array.nbytes)
+
+    state = {
+        'version': CHECKPOINT_VERSION,
+        'engine': simulation.engine,
+        'width': simulation.width,
+        'height': simulation.height,
+        'settings': {
+            'initial_organisms': simulation.initial_organisms,
+            'food_spawn_rate': simulation.food_spawn_rate,
+            'max_food': simulation.max_food,
+            'max_substep_dt': simulation.max_substep_dt,
+            'use_spatial_index': simulation.use_spatial_index,
+        },
+        'time_step': simulation.time_step,
+        'generation_count': simulation.generation_count,
+        'next_organism_id': next_organism_id,
+        'next_food_id': simulation.next_food_id,
+        'running_stats': simulation.running_stats.get_state(),
+        'stats': simulation.stats,
+        'history': {
+            'total_samples': history['total_samples'],
+            'block_size': history['block_size'],
+        },
+        'rng': simulation._get_rng_state(),
+        'arrays': layout,
+    }
+    header = json.dumps(state).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            # Двумерные массивы (гены) пишутся по строкам: срез колонок популяции
+            # не непрерывен, но каждая его строка непрерывна
+            for block in (array if array.ndim > 1 else (array,)):
+                f.write(np.ascontiguousarray(block).data)
+    os.replace(temp_path, path)
+
+def read_checkpoint(path):
+    """Читает заголовок файла сохранения и отображает его массивы в память.
+
+    Массивы открываются в режиме копирования при записи (mmap 'c'): данные
+    читаются с диска по мере обращения, а изменения остаются в памяти
+    процесса и не попадают в файл. Возвращает (состояние, {имя: массив}).
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Файл не является сохранением симуляции: {path}")
+        size = int.from_bytes(f.read(8), 'little')
+        state = json.loads(f.read(size).decode('utf-8'))
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия сохранения: {state.get('version')}")
+
+    data_start = _aligned(len(MAGIC) + 8 + size)
+    arrays = {}
+    for name, info in state.pop('arrays').items():
+        dtype = np.dtype(info['dtype'])
+        shape = tuple(info['shape'])
+        if 0 in shape:
+            # Пустой массив отобразить нельзя
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(path, dtype=dtype, mode='c',
+                                     offset=data_start + info['offset'], shape=shape)
+    return state, arrays
+
+def _check_checkpoint(simulation, state, arrays):
+    """Проверяет, что сохранение целиком подходит симуляции (до любых изменений)"""
+    missing = [name for name in STATE_FIELDS if name not in state]
+    if missing:
+        raise ValueError(f"В заголовке сохранения нет полей: {', '.join(missing)}")
+    if state['engine'] != simulation.engine:
+        raise ValueError(f"Сохранение движка {state['engine']} нельзя загрузить "
+                         f"в движок {simulation.engine}")
+
+    missing = [name for name in ORGANISM_COLUMNS if f'organism_{name}' not in arrays]
+    missing += [name for name in FOOD_COLUMNS if f'food_{name}' not in arrays]
+    missing += [name for name in HISTORY_ARRAYS if f'history_{name}' not in arrays]
+    if missing:
+        raise ValueError(f"В сохранении нет колонок: {', '.join(missing)}")
+
+    count = len(arrays['organism_ids'])
+    for name in ORGANISM_COLUMNS:
+        shape = (len(GENE_NAMES), count) if name == 'genes' else (count,)
+        if arrays[f'organism_{name}'].shape != shape:
+            raise ValueError(f"Неверная форма колонки организмов {name}")
+    count = len(arrays['food_id'])
+    if any(arrays[f'food_{name}'].shape != (count,) for name in FOOD_COLUMNS):
+        raise ValueError("Колонки пищи разной длины")
+
+    if len(arrays['history_block_counts']) > simulation.gene_history.overview_size:
+        raise ValueError("Обзор сохраненной истории больше размера обзора")
+
+    if set(state['rng']['streams']) != set(simulation.rng):
+        raise ValueError("Потоки случайных чисел сохранения не совпадают с симуляцией")
+
+def restore_checkpoint(simulation, path):
+    """Загружает состояние из файла сохранения в существующую симуляцию.
+
+    Файл проверяется целиком до изменения симуляции, поэтому при ошибке
+    (другой движок, поврежденный файл) ее состояние остается прежним.
+    """
+    _restore(simulation, *read_checkpoint(path))
+
+def _restore(simulation, state, arrays):
+    """Переносит прочитанное сохранение в симуляцию"""
+    _check_checkpoint(simulation, state, arrays)
+
+    organisms = {name: arrays[f'organism_{name}'] for name in ORGANISM_COLUMNS}
+    food = {name: arrays[f'food_{name}'] for name in FOOD_COLUMNS}
+    history = {name[len('history_'):]: array.tolist() for name, array in arrays.items()
+               if name.startswith('history_')}
+
+    simulation.width = state['width']
+    simulation.height = state['height']
+    for name, value in state['settings'].items():
+        setattr(simulation, name, value)
+    simulation.time_step = state['time_step']
+    simulation.generation_count = state['generation_count']
+    simulation.stats = state['stats']
+
+    # Организмы и накопительные суммы (суммы сохранены как есть, чтобы прогон
+    # после загрузки совпадал с непрерывным до последнего бита)
+    simulation._restore_organisms(organisms, state['next_organism_id'])
+    simulation.running_stats.set_state(state['running_stats'])
+
+    # Пища и ее сетка
+    simulation.food_sources.clear()
+    simulation.food_index.reset()
+    columns = [column.tolist() for column in food.values()]
+    for values in zip(*columns):
+        item = dict(zip(FOOD_COLUMNS, values))
+        simulation.food_sources.append(item)
+        simulation.food_index.insert(item['id'], item['x'], item['y'], item)
+    simulation.next_food_id = state['next_food_id']
+
+    history.update(state['history'])
+    simulation.gene_history.set_state(history)
+
+    # Генераторы случайных чисел
+    simulation._set_rng_state(state['rng'])
+    simulation._update_rankings()
+
+    if simulation.publish_snapshots:
+        simulation._publish_snapshot()
+
+def load_checkpoint(path, **options):
+    """Создает симуляцию нужного движка и загружает в нее файл сохранения"""
+    state, arrays = read_checkpoint(path)
+    simulation = create_simulation(state['width'], state['height'], engine=state['engine'],
+                                   **options)
+    _restore(simulation, state, arrays)
+    return simulation
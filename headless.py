@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Запуск симуляции без графического интерфейса (для пакетных расчетов)
+"""
+
+import argparse
+import json
+import time
+from simulation import create_simulation, ENGINES
+
+def run_simulation(steps, engine='python', width=800, height=600, initial_organisms=20,
+                   food_spawn_rate=0.5, max_food=80, seed=None, dt=1.0, profile=False):
+    """Выполняет steps шагов симуляции и возвращает результаты в виде словаря"""
+    sim = create_simulation(width, height, engine=engine, seed=seed)
+    sim.set_parameters(initial_organisms=initial_organisms, food_spawn_rate=food_spawn_rate,
+                       max_food=max_food)
+    sim.reset()
+    if profile:
+        # Окно замеров охватывает весь прогон (но не больше 100 000 шагов)
+        sim.enable_profiling(window=max(1, min(steps, 100000)))
+
+    # Средняя популяция за вторую половину прогона (равновесный размер)
+    population_sum = 0
+    tail_start = steps // 2
+
+    start = time.perf_counter()
+    for step in range(steps):
+        sim.update(dt=dt)
+        if step >= tail_start:
+            population_sum += sim.stats['population']
+    elapsed = time.perf_counter() - start
+
+    return {
+        'config': {
+            'engine': engine,
+            'width': width,
+            'height': height,
+            'initial_organisms': initial_organisms,
+            'food_spawn_rate': food_spawn_rate,
+            'max_food': max_food,
+            # Фактическое зерно: прогон без --seed тоже можно повторить
+            'seed': sim.seed,
+            'dt': dt,
+        },
+        'steps': steps,
+        'elapsed_seconds': elapsed,
+        'steps_per_second': steps / elapsed if elapsed > 0 else float('inf'),
+        'mean_population': population_sum / max(1, steps - tail_start),
+        'statistics': sim.get_statistics(),
+        'gene_history': sim.get_gene_history(),
+        'gene_overview': sim.get_gene_overview(),
+        'phase_timings': sim.get_phase_timings(),
+    }
+
+def main(argv=None):
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Эволюция: запуск без графического интерфейса")
+    parser.add_argument('--engine', choices=ENGINES, default='python',
+                        help="движок симуляции (python - объекты, numpy - массивы)")
+    parser.add_argument('--width', type=int, default=800, help="ширина мира")
+    parser.add_argument('--height', type=int, default=600, help="высота мира")
+    parser.add_argument('--population', type=int, default=20, help="начальная популяция")
+    parser.add_argument('--food-rate', type=float, default=0.5, help="частота появления пищи")
+    parser.add_argument('--max-food', type=int, default=80, help="максимум пищи в мире")
+    parser.add_argument('--seed', type=int, default=None, help="зерно генератора случайных чисел")
+    parser.add_argument('--steps', type=int, default=1000, help="число шагов")
+    parser.add_argument('--dt', type=float, default=1.0, help="длительность шага")
+    parser.add_argument('--profile', action='store_true',
+                        help="замерять длительность фаз шага (p50/p95/max)")
+    parser.add_argument('--output', default='results.json',
+                        help="файл для итоговой статистики и истории генов (JSON)")
+    args = parser.parse_args(argv)
+
+    result = run_simulation(args.steps, engine=args.engine, width=args.width, height=args.height,
+                            initial_organisms=args.population, food_spawn_rate=args.food_rate,
+                            max_food=args.max_food, seed=args.seed, dt=args.dt,
+                            profile=args.profile)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    stats = result['statistics']
+    print(f"Шагов: {result['steps']} за {result['elapsed_seconds']:.2f} с "
+          f"({result['steps_per_second']:.1f} шагов/с)")
+    print(f"Зерно: {result['config']['seed']}")
+    print(f"Популяция: {stats['population']}, рождений: {stats['total_births']}, "
+          f"смертей: {stats['total_deaths']}")
+    for phase, timing in result['phase_timings'].items():
+        print(f"  {phase:12} p50 {timing['p50']:.3f} мс, p95 {timing['p95']:.3f} мс, "
+              f"max {timing['max']:.3f} мс")
+    print(f"Результаты записаны в {args.output}")
+
+if __name__ == "__main__":
+    main()
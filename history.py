@@ -0,0 +1,153 @@
+from array import array
+
+# Показатели, которые сохраняются в истории
+HISTORY_KEYS = ('speed', 'size', 'energy_efficiency', 'aggression', 'mutation_rate', 'fitness')
+
+class GeneHistory:
+    """История средних значений генов ограниченного размера.
+
+    Последние capacity точек хранятся в кольцевом буфере типизированных
+    массивов. Дополнительно (если overview_size > 0) ведется обзор всей
+    истории: блоки с минимумом, средним и максимумом. Когда блоки
+    заканчиваются, соседние попарно сливаются и длина блока удваивается,
+    поэтому обзор всегда покрывает весь прогон при постоянной памяти.
+    """
+
+    def __init__(self, capacity=1000, overview_size=200):
+        if capacity <= 0:
+            raise ValueError("Емкость истории должна быть положительной")
+        if overview_size % 2:
+            raise ValueError("Размер обзора должен быть четным")
+        self.capacity = capacity
+        self.overview_size = overview_size
+        self.clear()
+
+    def clear(self):
+        """Очищает историю"""
+        self._values = {key: array('d', [0.0]) * self.capacity for key in HISTORY_KEYS}
+        self._start = 0
+        self._count = 0
+        self.total_samples = 0
+
+        size = self.overview_size
+        self.block_size = 1  # Точек истории в одном блоке обзора
+        self._blocks = 0
+        self._block_counts = array('q', [0]) * size
+        self._block_min = {key: array('d', [0.0]) * size for key in HISTORY_KEYS}
+        self._block_sum = {key: array('d', [0.0]) * size for key in HISTORY_KEYS}
+        self._block_max = {key: array('d', [0.0]) * size for key in HISTORY_KEYS}
+
+    def __len__(self):
+        return self._count
+
+    def append(self, sample):
+        """Добавляет точку истории (словарь значений по HISTORY_KEYS)"""
+        # Кольцевой буфер: при заполнении перезаписывается самая старая точка
+        index = (self._start + self._count) % self.capacity
+        for key in HISTORY_KEYS:
+            self._values[key][index] = sample[key]
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+        self.total_samples += 1
+
+        if self.overview_size:
+            self._add_to_overview(sample)
+
+    def _add_to_overview(self, sample):
+        """Добавляет точку в обзор всей истории"""
+        block = self._blocks - 1
+        if block < 0 or self._block_counts[block] >= self.block_size:
+            if self._blocks == self.overview_size:
+                self._merge_blocks()
+            block = self._blocks
+            self._blocks += 1
+            self._block_counts[block] = 0
+            for key in HISTORY_KEYS:
+                self._block_min[key][block] = sample[key]
+                self._block_sum[key][block] = 0.0
+                self._block_max[key][block] = sample[key]
+
+        self._block_counts[block] += 1
+        for key in HISTORY_KEYS:
+            value = sample[key]
+            self._block_sum[key][block] += value
+            if value < self._block_min[key][block]:
+                self._block_min[key][block] = value
+            if value > self._block_max[key][block]:
+                self._block_max[key][block] = value
+
+    def _merge_blocks(self):
+        """Сливает соседние блоки обзора попарно, удваивая длину блока"""
+        half = self.overview_size // 2
+        counts = self._block_counts
+        for i in range(half):
+            counts[i] = counts[2 * i] + counts[2 * i + 1]
+        for key in HISTORY_KEYS:
+            block_min = self._block_min[key]
+            block_sum = self._block_sum[key]
+            block_max = self._block_max[key]
+            for i in range(half):
+                block_min[i] = min(block_min[2 * i], block_min[2 * i + 1])
+                block_sum[i] = block_sum[2 * i] + block_sum[2 * i + 1]
+                block_max[i] = max(block_max[2 * i], block_max[2 * i + 1])
+        self._blocks = half
+        self.block_size *= 2
+
+    def series(self, key):
+        """Возвращает последние точки показателя в хронологическом порядке"""
+        values = self._values[key]
+        end = self._start + self._count
+        if end <= self.capacity:
+            return values[self._start:end].tolist()
+        return values[self._start:].tolist() + values[:end - self.capacity].tolist()
+
+    def as_dict(self):
+        """Возвращает историю в виде словаря списков"""
+        return {key: self.series(key) for key in HISTORY_KEYS}
+
+    def get_state(self):
+        """Возвращает состояние истории (последние точки и обзор) в виде словаря списков"""
+        blocks = self._blocks
+        state = {
+            'total_samples': self.total_samples,
+            'block_size': self.block_size,
+            'block_counts': self._block_counts[:blocks].tolist(),
+        }
+        for key in HISTORY_KEYS:
+            state[f'series_{key}'] = self.series(key)
+            state[f'block_min_{key}'] = self._block_min[key][:blocks].tolist()
+            state[f'block_sum_{key}'] = self._block_sum[key][:blocks].tolist()
+            state[f'block_max_{key}'] = self._block_max[key][:blocks].tolist()
+        return state
+
+    def set_state(self, state):
+        """Восстанавливает состояние, полученное из get_state"""
+        blocks = len(state['block_counts'])
+        if blocks > self.overview_size:
+            raise ValueError("Обзор сохраненной истории больше размера обзора")
+        self.clear()
+        for key in HISTORY_KEYS:
+            # Если емкость меньше сохраненной истории, остаются последние точки
+            values = list(state[f'series_{key}'])[-self.capacity:]
+            self._values[key][:len(values)] = array('d', values)
+            self._block_min[key][:blocks] = array('d', state[f'block_min_{key}'])
+            self._block_sum[key][:blocks] = array('d', state[f'block_sum_{key}'])
+            self._block_max[key][:blocks] = array('d', state[f'block_max_{key}'])
+        self._count = len(values)
+        self.total_samples = int(state['total_samples'])
+        self.block_size = int(state['block_size'])
+        self._blocks = blocks
+        self._block_counts[:blocks] = array('q', state['block_counts'])
+
+    def overview(self, key):
+        """Возвращает обзор всей истории показателя: списки min, mean и max по блокам"""
+        blocks = self._blocks
+        counts = self._block_counts
+        block_sum = self._block_sum[key]
+        return {
+            'min': self._block_min[key][:blocks].tolist(),
+            'mean': [block_sum[i] / counts[i] for i in range(blocks)],
+            'max': self._block_max[key][:blocks].tolist(),
+        }
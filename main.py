@@ -1,23 +1,52 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import argparse
 import threading
-import time
-import math
-from simulation import EvolutionSimulation
+from simulation import create_simulation, ENGINES
+from renderer import CanvasRenderer, RasterRenderer
+from scheduler import StepScheduler
+from checkpoint import load_checkpoint
+
+# Обратно на отрисовку элементами канваса переходим ниже этой доли порога,
+# чтобы популяция у самого порога не пересоздавала элементы каждый кадр
+RASTER_OFF_RATIO = 0.8
+
+# Подписи фаз шага в панели статистики
+PHASE_LABELS = {
+    'step': 'Шаг целиком',
+    'spawn_food': 'Пища',
+    'organisms': 'Организмы',
+    'interactions': 'Взаимодействия',
+    'reproduction': 'Размножение',
+    'remove_dead': 'Смерть',
+    'statistics': 'Статистика',
+    'ranking': 'Лучшие',
+    'snapshot': 'Снимок',
+}
 
 class EvolutionGameGUI:
     """Графический интерфейс для игры 'Эволюция: Простая жизнь'"""
     
-    def __init__(self):
+    def __init__(self, engine='python', raster_threshold=2000, seed=None):
         self.root = tk.Tk()
         self.root.title("Эволюция: Простая жизнь")
         self.root.geometry("1200x800")
         
         # Симуляция
-        self.simulation = EvolutionSimulation(width=800, height=600)
+        self.engine = engine
+        self.seed = seed
+        self.simulation = create_simulation(width=800, height=600, engine=engine, snapshots=True,
+                                            seed=seed)
         self.running = False
+        # Поток симуляции (None, если не запущен)
+        self.simulation_thread = None
         self.simulation_speed = 1.0
-        self.selected_organism = None
+        # Шаги с фиксированным dt; скорость задает число шагов в секунду
+        self.scheduler = StepScheduler(lambda dt: self.simulation.update(dt=dt))
+        # Выбранный организм хранится по id: GUI работает только со снимками
+        self.selected_id = None
+        # Выше этого размера популяции используется растровая отрисовка
+        self.raster_threshold = raster_threshold
         
         # Настройка интерфейса
         self._setup_ui()
@@ -39,6 +68,9 @@ class EvolutionGameGUI:
         self.canvas = tk.Canvas(left_frame, width=800, height=600, bg='#001122')
         self.canvas.pack(pady=5)
         self.canvas.bind("<Button-1>", self._on_canvas_click)
+        self.canvas_renderer = CanvasRenderer(self.canvas)
+        self.raster_renderer = RasterRenderer(self.canvas, 800, 600)
+        self.renderer = self.canvas_renderer
         
         # Кнопки управления
         control_frame = ttk.Frame(left_frame)
@@ -46,6 +78,8 @@ class EvolutionGameGUI:
         
         ttk.Button(control_frame, text="Старт/Пауза", command=self._toggle_simulation).pack(side=tk.LEFT, padx=2)
         ttk.Button(control_frame, text="Сброс", command=self._reset_simulation).pack(side=tk.LEFT, padx=2)
+        ttk.Button(control_frame, text="Сохранить", command=self._save_simulation).pack(side=tk.LEFT, padx=2)
+        ttk.Button(control_frame, text="Загрузить", command=self._load_simulation).pack(side=tk.LEFT, padx=2)
         ttk.Button(control_frame, text="Настройки", command=self._show_settings).pack(side=tk.LEFT, padx=2)
         ttk.Button(control_frame, text="Графики эволюции", command=self._show_evolution_graphs).pack(side=tk.LEFT, padx=2)
         
@@ -72,6 +106,11 @@ class EvolutionGameGUI:
         self.stats_text = tk.Text(stats_frame, height=12, width=30, font=('Courier', 9))
         self.stats_text.pack(padx=5, pady=5)
         
+        # Замеры фаз шага (выводятся в панели статистики)
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(stats_frame, text="Замер фаз шага", variable=self.profile_var,
+                        command=self._apply_profiling).pack(anchor=tk.W, padx=5)
+        
         # Информация о выбранном организме
         info_frame = ttk.LabelFrame(right_frame, text="Информация об организме")
         info_frame.pack(fill=tk.BOTH, expand=True, pady=5)
@@ -81,111 +120,113 @@ class EvolutionGameGUI:
         
     def _toggle_simulation(self):
         """Запуск/остановка симуляции"""
-        self.running = not self.running
         if self.running:
+            self._stop_simulation()
+        else:
+            self.running = True
             self._run_simulation()
             
     def _run_simulation(self):
         """Запуск симуляции в отдельном потоке"""
         def simulation_loop():
-            while self.running:
-                self.simulation.update(dt=self.simulation_speed)
-                time.sleep(0.05)  # 20 FPS
+            self.scheduler.run(lambda: self.running)
                 
-        thread = threading.Thread(target=simulation_loop, daemon=True)
-        thread.start()
+        self.simulation_thread = threading.Thread(target=simulation_loop, daemon=True)
+        self.simulation_thread.start()
+        
+    def _stop_simulation(self):
+        """Останавливает симуляцию и ждет, пока поток закончит текущий шаг.
+
+        После возврата состояние симуляции не меняется другим потоком, поэтому
+        его можно сбрасывать, сохранять и заменять.
+        """
+        self.running = False
+        if self.simulation_thread is not None:
+            self.simulation_thread.join()
+            self.simulation_thread = None
         
     def _reset_simulation(self):
         """Сброс симуляции"""
-        self.running = False
+        self._stop_simulation()
         self.simulation.reset()
-        self.selected_organism = None
+        self.selected_id = None
+        self.renderer.clear()
+        
+    def _save_simulation(self):
+        """Сохранение состояния симуляции в файл"""
+        self._stop_simulation()
+        path = filedialog.asksaveasfilename(defaultextension=".evo",
+                                            filetypes=[("Сохранения симуляции", "*.evo")])
+        if path:
+            self.simulation.save_checkpoint(path)
+            
+    def _load_simulation(self):
+        """Загрузка состояния симуляции из файла"""
+        self._stop_simulation()
+        path = filedialog.askopenfilename(filetypes=[("Сохранения симуляции", "*.evo")])
+        if not path:
+            return
+        try:
+            simulation = load_checkpoint(path, snapshots=True)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить сохранение: {e}")
+            return
+        self.simulation = simulation
+        self.engine = simulation.engine
+        self._apply_profiling()
+        self.selected_id = None
+        self.renderer.clear()
+        
+    def _apply_profiling(self):
+        """Включает или выключает замеры фаз шага по флажку"""
+        if self.profile_var.get():
+            self.simulation.enable_profiling()
+        else:
+            self.simulation.disable_profiling()
         
     def _update_speed(self, value):
         """Обновление скорости симуляции"""
         self.simulation_speed = float(value)
+        self.scheduler.speed = self.simulation_speed
         self.speed_label.config(text=f"Скорость: {self.simulation_speed:.1f}x")
         
     def _on_canvas_click(self, event):
         """Обработка клика по канвасу"""
-        # Поиск ближайшего организма
-        min_distance = float('inf')
-        closest_organism = None
-        
-        for organism in self.simulation.get_organisms():
-            distance = math.sqrt((event.x - organism.x)**2 + (event.y - organism.y)**2)
-            if distance < min_distance and distance < 20:
-                min_distance = distance
-                closest_organism = organism
-                
-        self.selected_organism = closest_organism
+        # Поиск ближайшего организма в последнем снимке
+        snapshot = self.simulation.get_snapshot()
+        row = snapshot.nearest(event.x, event.y, max_distance=20)
+        self.selected_id = None if row is None else int(snapshot.organisms['ids'][row])
         
     def _update_display(self):
         """Обновление отображения"""
-        # Очистка канваса
-        self.canvas.delete("all")
-        
-        # Отрисовка пищи
-        for food in self.simulation.get_food_sources():
-            x, y = food['x'], food['y']
-            size = food['size']
-            self.canvas.create_oval(x-size, y-size, x+size, y+size, 
-                                  fill='green', outline='darkgreen')
-            
-        # Отрисовка организмов
-        organisms = self.simulation.get_organisms()
-        best_organisms = self.simulation.get_best_organisms(top_n=5)
-        
-        for organism in organisms:
-            x, y = organism.x, organism.y
-            size = organism.genes['size']
-            color = self._rgb_to_hex(*organism.get_color())
-            
-            # Выделение выбранного организма
-            if organism == self.selected_organism:
-                outline = 'yellow'
-                outline_width = 3
-            elif organism in best_organisms:
-                # Выделяем лучших организмов зелёной обводкой
-                outline = 'lime'
-                outline_width = 2
-            else:
-                outline = 'black'
-                outline_width = 1
-            
-            self.canvas.create_oval(x-size, y-size, x+size, y+size,
-                                  fill=color, outline=outline, width=outline_width)
-                                  
-            # Показ энергии как полоска
-            energy_ratio = min(1.0, organism.energy / 100)
-            bar_width = size * 2
-            bar_height = 3
-            bar_x = x - bar_width / 2
-            bar_y = y - size - 8
-            
-            # Фон полоски энергии
-            self.canvas.create_rectangle(bar_x, bar_y, bar_x + bar_width, bar_y + bar_height,
-                                       fill='darkred', outline='')
-            # Энергия
-            self.canvas.create_rectangle(bar_x, bar_y, bar_x + bar_width * energy_ratio, bar_y + bar_height,
-                                       fill='red', outline='')
+        # Отрисовка идет только по опубликованному снимку, без доступа к живым спискам
+        snapshot = self.simulation.get_snapshot()
+        
+        # Большие популяции рисуются растром, остальные - элементами канваса
+        if snapshot.population > self.raster_threshold:
+            renderer = self.raster_renderer
+        elif snapshot.population < self.raster_threshold * RASTER_OFF_RATIO:
+            renderer = self.canvas_renderer
+        else:
+            renderer = self.renderer
+        if renderer is not self.renderer:
+            self.renderer.clear()
+            self.renderer = renderer
+        renderer.render(snapshot, self.selected_id)
         
         # Обновление статистики
-        self._update_statistics()
+        self._update_statistics(snapshot)
         
         # Обновление информации о выбранном организме
-        self._update_organism_info()
+        self._update_organism_info(snapshot)
         
         # Планирование следующего обновления
         self.root.after(50, self._update_display)  # 20 FPS
         
-    def _rgb_to_hex(self, r, g, b):
-        """Преобразование RGB в hex"""
-        return f"#{r:02x}{g:02x}{b:02x}"
-        
-    def _update_statistics(self):
+    def _update_statistics(self, snapshot):
         """Обновление статистики"""
-        stats = self.simulation.get_statistics()
+        stats = snapshot.stats
+        scheduler = self.scheduler
         
         stats_text = f"""ОБЩАЯ СТАТИСТИКА
 
@@ -202,21 +243,31 @@ class EvolutionGameGUI:
 Частота мутаций: {stats['avg_mutation_rate']:.3f}
 Приспособленность: {stats['avg_fitness']:.1f}
 
-ВРЕМЯ СИМУЛЯЦИИ: {self.simulation.time_step}
+ВРЕМЯ СИМУЛЯЦИИ: {snapshot.time_step}
+Шагов/с: {scheduler.measured_rate:.0f} из {scheduler.target_rate:.0f}
 """
+        if self.running and scheduler.behind:
+            stats_text += f"ОТСТАВАНИЕ (пропущено шагов: {scheduler.dropped_steps})\n"
+        
+        timings = self.simulation.get_phase_timings()
+        if timings:
+            stats_text += "\nФАЗЫ, мс (p50/p95/max):\n"
+            for phase, timing in timings.items():
+                label = PHASE_LABELS.get(phase, phase)
+                stats_text += (f"{label[:12]:12} {timing['p50']:.2f}/{timing['p95']:.2f}"
+                               f"/{timing['max']:.2f}\n")
         
         self.stats_text.delete(1.0, tk.END)
         self.stats_text.insert(1.0, stats_text)
         
-    def _update_organism_info(self):
+    def _update_organism_info(self, snapshot):
         """Обновление информации о выбранном организме"""
-        if self.selected_organism and self.selected_organism.alive:
-            org = self.selected_organism
-            info = org.get_info()
+        row = snapshot.row_of(self.selected_id)
+        if row is not None:
+            info = snapshot.organism_info(row)
             
             # Определяем ранг организма по приспособленности
-            best_organisms = self.simulation.get_best_organisms(top_n=len(self.simulation.get_organisms()))
-            rank = best_organisms.index(org) + 1 if org in best_organisms else "?"
+            rank = snapshot.rank_of(row)
             
             info_text = f"""ВЫБРАННЫЙ ОРГАНИЗМ
 
@@ -236,7 +287,7 @@ class EvolutionGameGUI:
 
 ЦВЕТ RGB: ({info['genes']['color_r']}, {info['genes']['color_g']}, {info['genes']['color_b']})
 
-Может размножаться: {'Да' if org.can_reproduce() else 'Нет'}
+Может размножаться: {'Да' if info['can_reproduce'] else 'Нет'}
 """
         else:
             info_text = "Нажмите на организм\nдля получения информации"
@@ -275,8 +326,11 @@ class EvolutionGameGUI:
             settings_window.destroy()
             
         def reset_to_defaults():
-            self.running = False
-            self.simulation = EvolutionSimulation()
+            self._stop_simulation()
+            self.simulation = create_simulation(engine=self.engine, snapshots=True, seed=self.seed)
+            self._apply_profiling()
+            self.selected_id = None
+            self.renderer.clear()
             settings_window.destroy()
             
         ttk.Button(button_frame, text="Применить", command=apply_settings).pack(side=tk.LEFT, padx=5)
@@ -292,6 +346,7 @@ class EvolutionGameGUI:
         
         # Получаем историю генов
         gene_history = self.simulation.get_gene_history()
+        gene_overview = self.simulation.get_gene_overview()
         
         if not gene_history['speed']:
             tk.Label(graph_window, text="Недостаточно данных для построения графиков.\nПодождите некоторое время.").pack(pady=20)
@@ -324,20 +379,35 @@ class EvolutionGameGUI:
                         normalized = int((val - min_val) / (max_val - min_val) * 10)
                         graph_text += str(normalized)
                     graph_text += "\n"
+                    
+            # Обзор всего прогона (средние по блокам, до 20 точек)
+            means = gene_overview[gene_name]['mean']
+            if len(means) > 1:
+                min_val = min(means)
+                max_val = max(means)
+                if max_val > min_val:
+                    graph_text += "Весь прогон: "
+                    step = (len(means) + 19) // 20
+                    for val in means[::step]:
+                        normalized = int((val - min_val) / (max_val - min_val) * 9)
+                        graph_text += str(normalized)
+                    graph_text += "\n"
             graph_text += "\n"
             
         # Добавляем информацию о лучших организмах
-        best_organisms = self.simulation.get_best_organisms(top_n=10)
-        if best_organisms:
+        snapshot = self.simulation.get_snapshot()
+        best_rows = snapshot.top_rows(10)
+        if len(best_rows):
             graph_text += "=== ТОП-10 САМЫХ ПРИСПОСОБЛЕННЫХ ===\n\n"
-            for i, org in enumerate(best_organisms, 1):
-                graph_text += f"{i:2d}. Приспособленность: {org.fitness:6.1f} | "
-                graph_text += f"Поколение: {org.generation:2d} | "
-                graph_text += f"Энергия: {org.energy:5.1f} | "
-                graph_text += f"Возраст: {org.age:6.1f}\n"
-                graph_text += f"     Скорость: {org.genes['speed']:.2f} | "
-                graph_text += f"Размер: {org.genes['size']:.2f} | "
-                graph_text += f"Эффективность: {org.genes['energy_efficiency']:.2f}\n\n"
+            for i, row in enumerate(best_rows.tolist(), 1):
+                org = snapshot.organism_info(row)
+                graph_text += f"{i:2d}. Приспособленность: {org['fitness']:6.1f} | "
+                graph_text += f"Поколение: {org['generation']:2d} | "
+                graph_text += f"Энергия: {org['energy']:5.1f} | "
+                graph_text += f"Возраст: {org['age']:6.1f}\n"
+                graph_text += f"     Скорость: {org['genes']['speed']:.2f} | "
+                graph_text += f"Размер: {org['genes']['size']:.2f} | "
+                graph_text += f"Эффективность: {org['genes']['energy_efficiency']:.2f}\n\n"
         
         info_text.insert(1.0, graph_text)
         info_text.config(state=tk.DISABLED)
@@ -348,8 +418,18 @@ class EvolutionGameGUI:
 
 def main():
     """Главная функция"""
+    parser = argparse.ArgumentParser(description="Эволюция: Простая жизнь")
+    parser.add_argument('--engine', choices=ENGINES, default='python',
+                        help="движок симуляции (python - объекты, numpy - массивы)")
+    parser.add_argument('--raster-threshold', type=int, default=2000,
+                        help="размер популяции, с которого включается растровая отрисовка")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="зерно генератора случайных чисел (повторяемый прогон)")
+    args = parser.parse_args()
+    
     try:
-        game = EvolutionGameGUI()
+        game = EvolutionGameGUI(engine=args.engine, raster_threshold=args.raster_threshold,
+                                seed=args.seed)
         game.run()
     except Exception as e:
         messagebox.showerror("Ошибка", f"Произошла ошибка: {str(e)}")
@@ -0,0 +1,343 @@
+import math
+import numpy as np
+from organism import (GENE_NAMES, COLOR_GENES, INITIAL_GENE_RANGES, GENE_MIN_VALUE,
+                      GENE_MAX_VALUES, COLOR_MUTATION_SIGMA, AGGRESSION_THRESHOLD,
+                      GENE_INDEX, SPEED, SIZE, EFFICIENCY, THRESHOLD, AGGRESSION, MUTATION_RATE)
+from population import Population, OrganismView
+from simulation import EvolutionSimulation
+from running_stats import STAT_GENES
+from spatial import grid_pairs
+from snapshot import organism_arrays
+from ranking import TOP_K, top_rows
+
+# Маска цветовых генов и границы значений генов после мутации (столбцы (9, 1))
+IS_COLOR = np.array([name in COLOR_GENES for name in GENE_NAMES])[:, None]
+GENE_LOWER = np.array([0 if name in COLOR_GENES else GENE_MIN_VALUE
+                       for name in GENE_NAMES])[:, None]
+GENE_UPPER = np.array([255 if name in COLOR_GENES else GENE_MAX_VALUES.get(name, np.inf)
+                       for name in GENE_NAMES])[:, None]
+
+def mutate_gene_matrix(genes, rng):
+    """Мутирует геномы всех потомков одной матричной операцией.
+
+    genes - массив (9, k) с генами родителей, по столбцу на потомка. Правила те же,
+    что в organism.mutate_genes: обычные гены получают нормальный шум с отклонением
+    value * mutation_rate родителя, цветовые - шум с отклонением 20 и отбрасывание
+    дробной части; затем значения ограничиваются границами генов.
+    """
+    sigma = np.where(IS_COLOR, COLOR_MUTATION_SIGMA, genes * genes[MUTATION_RATE])
+    child = genes + rng.standard_normal(genes.shape) * sigma
+    # Цветовые гены округляются к нулю, как int() в последовательной версии
+    child = np.where(IS_COLOR, np.trunc(child), child)
+    return np.clip(child, GENE_LOWER, GENE_UPPER)
+
+class NumpySimulation(EvolutionSimulation):
+    """Симуляция, в которой популяция хранится колонками массивов NumPy.
+
+    Движение, расход энергии, старение и смерть выполняются одним векторным
+    проходом по всей популяции. Внешний интерфейс совпадает с EvolutionSimulation,
+    get_organisms() возвращает OrganismView вместо Organism.
+    """
+
+    engine = 'numpy'
+
+    def _create_streams(self, seed):
+        """Потоки случайных чисел: генераторы NumPy из одного SeedSequence.
+
+        Пища создается общим кодом базового класса, поэтому ее поток остается
+        random.Random.
+        """
+        streams = super()._create_streams(seed)
+        children = np.random.SeedSequence(seed).spawn(len(streams))
+        for name, child in zip(list(streams), children):
+            if name != 'food':
+                streams[name] = np.random.default_rng(child)
+        return streams
+
+    def _create_organisms(self):
+        """Пустая популяция"""
+        return Population()
+
+    @property
+    def next_organism_id(self):
+        """Следующий свободный id (счетчик ведет популяция при добавлении строк)"""
+        return self.organisms.next_id
+
+    @next_organism_id.setter
+    def next_organism_id(self, value):
+        self.organisms.next_id = value
+
+    def _spawn_initial_organisms(self):
+        """Создает начальную популяцию организмов"""
+        count = self.initial_organisms
+        start = self.organisms.n
+        rng = self.rng['spawn']
+
+        genes = np.empty((len(GENE_NAMES), count))
+        for i, gene_name in enumerate(GENE_NAMES):
+            low, high = INITIAL_GENE_RANGES[gene_name]
+            if gene_name in COLOR_GENES:
+                genes[i] = rng.integers(low, high, endpoint=True, size=count)
+            else:
+                genes[i] = rng.uniform(low, high, size=count)
+
+        self.organisms.append(
+            x=rng.uniform(50, self.width - 50, size=count),
+            y=rng.uniform(50, self.height - 50, size=count),
+            genes=genes,
+            direction=rng.uniform(0, 2 * math.pi, size=count),
+            energy=100,
+        )
+        self.running_stats.add_totals(*self._row_totals(slice(start, start + count)))
+
+    def _row_totals(self, rows):
+        """Суммы по строкам популяции в формате RunningStats.add_totals"""
+        pop = self.organisms
+        generation = pop.generation[rows]
+        gene_sums = {name: float(pop.genes[GENE_INDEX[name], rows].sum()) for name in STAT_GENES}
+        max_generation = int(generation.max()) if len(generation) else 0
+        return (len(generation), gene_sums, int(generation.sum()),
+                float(pop.fitness[rows].sum()), max_generation)
+
+    def _update_organisms(self, dt):
+        """Обновляет всю популяцию векторными операциями"""
+        pop = self.organisms
+        n = pop.n
+        if n == 0:
+            return
+        # После удаления мертвых на прошлом шаге все строки живые
+        genes = pop.genes[:, :n]
+        x, y = pop.x[:n], pop.y[:n]
+        direction = pop.direction[:n]
+        energy, age = pop.energy[:n], pop.age[:n]
+
+        # Старение и базовый расход энергии
+        age += dt
+        energy -= (genes[SIZE] * 0.02 + genes[SPEED] * 0.01) * dt / genes[EFFICIENCY]
+        pop.fitness[:n] = energy * 0.1 + age * 0.05
+        self.running_stats.fitness_sum = float(pop.fitness[:n].sum())
+
+        # Случайные изменения направления
+        rng = self.rng['movement']
+        turning = np.flatnonzero(rng.random(n) < 0.1)
+        direction[turning] += rng.uniform(-0.5, 0.5, size=len(turning))
+
+        # Движение
+        x += np.cos(direction) * genes[SPEED] * dt
+        y += np.sin(direction) * genes[SPEED] * dt
+
+        # Отражение от границ
+        out_x = (x < 0) | (x > self.width)
+        direction[out_x] = math.pi - direction[out_x]
+        np.clip(x, 0, self.width, out=x)
+        out_y = (y < 0) | (y > self.height)
+        direction[out_y] = -direction[out_y]
+        np.clip(y, 0, self.height, out=y)
+
+        self._consume_food()
+
+        # Проверка на смерть (бои не меняют знак энергии, поэтому идут после нее)
+        pop.alive[:n] = (energy > 0) & (age <= 2000)
+
+    def _consume_food(self):
+        """Поиск и потребление пищи всей популяцией.
+
+        Правило то же, что в Organism._seek_food: каждый организм съедает
+        первую по порядку появления пищу в радиусе досягаемости, даже если
+        ее уже съел другой организм на этом шаге (съеденная пища убирается
+        только в начале следующего шага).
+        """
+        pop = self.organisms
+        n = pop.n
+        food_sources = self.food_sources
+        if n == 0 or not food_sources:
+            return
+
+        fx = np.fromiter((food['x'] for food in food_sources), np.float64, len(food_sources))
+        fy = np.fromiter((food['y'] for food in food_sources), np.float64, len(food_sources))
+        fsize = np.fromiter((food['size'] for food in food_sources), np.float64, len(food_sources))
+        fenergy = np.fromiter((food['energy'] for food in food_sources), np.float64, len(food_sources))
+
+        x, y = pop.x[:n], pop.y[:n]
+        size = pop.genes[SIZE, :n]
+        cell_size = size.max() + fsize.max()
+        ia, jf = grid_pairs(x, y, fx, fy, cell_size)
+        close = np.hypot(x[ia] - fx[jf], y[ia] - fy[jf]) < size[ia] + fsize[jf]
+        ia, jf = ia[close], jf[close]
+
+        # Пары по организму, внутри - по порядку появления пищи;
+        # каждому организму достается первая пища в его группе
+        order = np.lexsort((jf, ia))
+        ia, jf = ia[order], jf[order]
+        fed, first = np.unique(ia, return_index=True)
+        foods = jf[first]
+
+        pop.energy[fed] += fenergy[foods] * pop.genes[EFFICIENCY, fed] * 2.5
+        for j in np.unique(foods).tolist():
+            food_sources[j]['consumed'] = True
+
+    def _resolve_interactions(self):
+        """Агрессивные взаимодействия между близкими организмами.
+
+        Взаимодействуют только пары, где оба организма агрессивны, поэтому
+        поиск ведется только среди них. Каждая пара обрабатывается один раз,
+        по возрастанию (меньший id, больший id), как в последовательном движке
+        (правило боя - Organism.interact).
+        """
+        pop = self.organisms
+        n = pop.n
+        aggressive = np.flatnonzero((pop.genes[AGGRESSION, :n] > AGGRESSION_THRESHOLD) & pop.alive[:n])
+        if len(aggressive) < 2:
+            return
+
+        x, y = pop.x[aggressive], pop.y[aggressive]
+        size = pop.genes[SIZE, aggressive]
+        ia, ib = grid_pairs(x, y, x, y, 2 * size.max())
+        # Строки упорядочены по id, поэтому ia < ib - пара с меньшим id первым
+        close = (ia < ib) & (np.hypot(x[ia] - x[ib], y[ia] - y[ib]) < size[ia] + size[ib])
+        ia, ib = ia[close], ib[close]
+        if len(ia) == 0:
+            return
+
+        # Бои зависят от порядка, поэтому идут последовательно, но по спискам
+        # Python: индексация скаляров NumPy в цикле во много раз медленнее
+        order = np.lexsort((ib, ia))
+        energy = pop.energy[aggressive].tolist()
+        strength = (pop.genes[SIZE, aggressive] * pop.genes[SPEED, aggressive]).tolist()
+        for i, j in zip(ia[order].tolist(), ib[order].tolist()):
+            # Борьба - более крупный и быстрый побеждает (при равенстве - j)
+            if strength[i] > strength[j]:
+                energy[i] += energy[j] * 0.3
+                energy[j] -= energy[j] * 0.5
+            else:
+                energy[j] += energy[i] * 0.3
+                energy[i] -= energy[i] * 0.5
+        pop.energy[aggressive] = energy
+
+    def _handle_reproduction(self):
+        """Обрабатывает размножение организмов"""
+        pop = self.organisms
+        n = pop.n
+        eligible = (pop.alive[:n]
+                    & (pop.energy[:n] > pop.genes[THRESHOLD, :n])
+                    & (pop.age[:n] > 100))
+        self._reproduce(eligible)
+        
+    def _reproduce(self, parent_mask):
+        """Создает по одному потомку для каждого родителя из маски пакетно"""
+        pop = self.organisms
+        parents = np.flatnonzero(parent_mask)
+        count = len(parents)
+        if count == 0:
+            return
+        start = pop.n
+
+        # Тратим энергию на размножение
+        pop.energy[parents] -= pop.genes[THRESHOLD, parents] * 0.3
+
+        # Создаем потомков рядом с родителями
+        rng = self.rng['mutation']
+        offset = rng.uniform(-20, 20, size=(2, count))
+        pop.append(
+            x=np.clip(pop.x[parents] + offset[0], 10, self.width - 10),
+            y=np.clip(pop.y[parents] + offset[1], 10, self.height - 10),
+            genes=mutate_gene_matrix(pop.genes[:, parents], rng),
+            direction=rng.uniform(0, 2 * math.pi, size=count),
+            energy=60,
+            generation=pop.generation[parents] + 1,
+        )
+        self.running_stats.add_totals(*self._row_totals(slice(start, pop.n)))
+        self.stats['total_births'] += count
+
+    def _remove_dead_organisms(self):
+        """Удаляет мертвых организмов"""
+        pop = self.organisms
+        dead = np.flatnonzero(~pop.alive[:pop.n])
+        if len(dead):
+            self.running_stats.remove_totals(*self._row_totals(dead)[:4])
+        self.stats['total_deaths'] += pop.compact()
+
+    def _organism_columns(self):
+        """Колонки организмов для сохранения и следующий свободный id"""
+        pop = self.organisms
+        n = pop.n
+        columns = {name: getattr(pop, name)[:n] for name in Population.COLUMNS}
+        columns['genes'] = pop.genes[:, :n]
+        return columns, pop.next_id
+
+    def _restore_organisms(self, columns, next_organism_id):
+        """Восстанавливает популяцию из колонок сохранения"""
+        self.organisms = Population.from_columns(columns, next_organism_id)
+
+    def get_organism(self, organism_id):
+        """Возвращает живой организм по id или None.
+
+        Колонка ids отсортирована, поэтому строка находится бинарным поиском
+        (Population.row_of) без отдельного словаря, который пришлось бы
+        перестраивать при каждом сжатии массивов.
+        """
+        pop = self.organisms
+        row = pop.row_of(organism_id)
+        if row is None or not pop.alive[row]:
+            return None
+        return OrganismView(pop, row)
+
+    def get_organisms(self):
+        """Возвращает список живых организмов"""
+        pop = self.organisms
+        return [OrganismView(pop, row) for row in np.flatnonzero(pop.alive[:pop.n]).tolist()]
+
+    def get_organism_arrays(self):
+        """Возвращает живых организмов в виде словаря массивов NumPy (копии колонок)"""
+        pop = self.organisms
+        alive = np.flatnonzero(pop.alive[:pop.n])
+        return organism_arrays(
+            ids=pop.ids[alive],
+            x=pop.x[alive],
+            y=pop.y[alive],
+            energy=pop.energy[alive],
+            age=pop.age[alive],
+            fitness=pop.fitness[alive],
+            generation=pop.generation[alive],
+            genes=pop.genes[:, alive],
+        )
+
+    def _update_rankings(self):
+        """Отбирает TOP_K лучших организмов по приспособленности за O(n)"""
+        pop = self.organisms
+        alive = np.flatnonzero(pop.alive[:pop.n])
+        rows = alive[top_rows(pop.fitness[alive], TOP_K)]
+        self.top_organisms = [OrganismView(pop, row) for row in rows.tolist()]
+        self._clear_query_caches()
+
+    def get_best_organisms(self, top_n=5):
+        """Возвращает самых приспособленных организмов (по итогам последнего шага)"""
+        if top_n <= TOP_K:
+            return self.top_organisms[:top_n]
+        pop = self.organisms
+        alive = np.flatnonzero(pop.alive[:pop.n])
+        return [OrganismView(pop, row) for row in alive[top_rows(pop.fitness[alive], top_n)].tolist()]
+
+    def get_detailed_stats(self):
+        """Возвращает подробную статистику по поколениям"""
+        pop = self.organisms
+        alive = np.flatnonzero(pop.alive[:pop.n])
+        if len(alive) == 0:
+            return {}
+
+        generations, groups, counts = np.unique(pop.generation[alive], return_inverse=True,
+                                                return_counts=True)
+        gen_stats = {}
+        means = {}
+        for gene_name in ('speed', 'size', 'energy_efficiency', 'aggression'):
+            sums = np.bincount(groups, weights=pop.genes[GENE_INDEX[gene_name], alive])
+            means[gene_name] = sums / counts
+        for k, gen in enumerate(generations.tolist()):
+            gen_stats[gen] = {
+                'count': int(counts[k]),
+                'avg_speed': float(means['speed'][k]),
+                'avg_size': float(means['size'][k]),
+                'avg_energy_efficiency': float(means['energy_efficiency'][k]),
+                'avg_aggression': float(means['aggression'][k]),
+            }
+        return gen_stats
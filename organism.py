@@ -1,31 +1,142 @@
+import gc
 import random
 import math
+from array import array
+
+# Порядок генов (используется при хранении генов в массивах)
+GENE_NAMES = (
+    'speed', 'size', 'energy_efficiency', 'reproduction_threshold',
+    'aggression', 'mutation_rate', 'color_r', 'color_g', 'color_b',
+)
+COLOR_GENES = ('color_r', 'color_g', 'color_b')
+
+# Индекс гена в массиве генов
+GENE_INDEX = {name: i for i, name in enumerate(GENE_NAMES)}
+SPEED = GENE_INDEX['speed']
+SIZE = GENE_INDEX['size']
+EFFICIENCY = GENE_INDEX['energy_efficiency']
+THRESHOLD = GENE_INDEX['reproduction_threshold']
+AGGRESSION = GENE_INDEX['aggression']
+MUTATION_RATE = GENE_INDEX['mutation_rate']
+
+# Диапазоны начальных значений генов
+INITIAL_GENE_RANGES = {
+    'speed': (0.5, 3.0),                   # Скорость передвижения
+    'size': (2, 8),                        # Размер организма
+    'energy_efficiency': (0.3, 1.0),       # Эффективность использования энергии
+    'reproduction_threshold': (50, 100),   # Порог размножения
+    'aggression': (0.0, 1.0),              # Агрессивность (влияет на поведение)
+    'mutation_rate': (0.01, 0.1),          # Частота мутаций
+    'color_r': (0, 255),                   # Цвет (красный)
+    'color_g': (0, 255),                   # Цвет (зеленый)
+    'color_b': (0, 255),                   # Цвет (синий)
+}
+
+def random_genes(rng=random):
+    """Генерирует случайный набор генов (rng - генератор случайных чисел)"""
+    genes = {}
+    for gene_name in GENE_NAMES:
+        low, high = INITIAL_GENE_RANGES[gene_name]
+        if gene_name in COLOR_GENES:
+            genes[gene_name] = rng.randint(low, high)
+        else:
+            genes[gene_name] = rng.uniform(low, high)
+    return genes
+
+# Верхние границы генов после мутации (нижняя граница обычных генов - 0.1)
+GENE_MIN_VALUE = 0.1
+GENE_MAX_VALUES = {
+    'speed': 5.0,
+    'size': 15.0,
+    'energy_efficiency': 1.0,
+    'aggression': 1.0,
+    'mutation_rate': 0.2,
+}
+# Цветовые гены мутируют с фиксированным отклонением в пределах 0..255
+COLOR_MUTATION_SIGMA = 20
+
+# Организмы дерутся, только если агрессивность обоих выше порога
+AGGRESSION_THRESHOLD = 0.7
+
+def mutate_genes(genes, rng=random):
+    """Возвращает мутированную копию генов"""
+    new_genes = {}
+    for gene_name, gene_value in genes.items():
+        if gene_name in COLOR_GENES:
+            # Цветовые гены мутируют по-особому
+            new_genes[gene_name] = max(0, min(255, int(gene_value + rng.gauss(0, COLOR_MUTATION_SIGMA))))
+        else:
+            # Обычные гены мутируют с нормальным распределением
+            mutation_strength = genes['mutation_rate']
+            mutation = rng.gauss(0, gene_value * mutation_strength)
+            new_genes[gene_name] = max(GENE_MIN_VALUE, gene_value + mutation)
+            
+            # Ограничения на значения генов
+            if gene_name in GENE_MAX_VALUES:
+                new_genes[gene_name] = min(GENE_MAX_VALUES[gene_name], new_genes[gene_name])
+    return new_genes
+
+def organisms_from_columns(columns):
+    """Создает организмы из колонок сохранения (массивы NumPy, гены - (9, n)).
+
+    Атрибуты присваиваются напрямую, без __init__ и случайных значений, а гены
+    копируются в gene_values из непрерывного буфера. Сборщик мусора на время
+    создания отключается: иначе он многократно обходит растущий список.
+    """
+    width = len(GENE_NAMES) * array('d').itemsize
+    genes = memoryview(columns['genes'].T.copy()).cast('B')
+    rows = zip(columns['ids'].tolist(), columns['x'].tolist(), columns['y'].tolist(),
+               columns['direction'].tolist(), columns['energy'].tolist(),
+               columns['age'].tolist(), columns['fitness'].tolist(),
+               columns['generation'].tolist(), columns['alive'].tolist())
+    new = Organism.__new__
+    organisms = []
+    start = 0
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for organism_id, x, y, direction, energy, age, fitness, generation, alive in rows:
+            organism = new(Organism)
+            organism.id = organism_id
+            organism.x = x
+            organism.y = y
+            organism.direction = direction
+            organism.energy = energy
+            organism.age = age
+            organism.fitness = fitness
+            organism.generation = generation
+            organism.alive = alive
+            gene_values = array('d')
+            gene_values.frombytes(genes[start:start + width])
+            organism.gene_values = gene_values
+            organisms.append(organism)
+            start += width
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return organisms
 
 class Organism:
-    """Класс представляющий простой организм с набором генов"""
+    """Класс представляющий простой организм с набором генов.
+
+    Для экономии памяти атрибуты объявлены в __slots__, а гены хранятся
+    в массиве gene_values в порядке GENE_NAMES. Свойство genes возвращает
+    копию генов в виде словаря (изменять гены нужно присваиванием genes).
+    """
+    
+    __slots__ = ('x', 'y', 'gene_values', 'id', 'energy', 'age', 'alive', 'generation',
+                 'fitness', 'direction')
     
-    def __init__(self, x=None, y=None, genes=None):
+    def __init__(self, x=None, y=None, genes=None, rng=random):
         # Позиция организма
-        self.x = x if x is not None else random.uniform(0, 800)
-        self.y = y if y is not None else random.uniform(0, 600)
+        self.x = x if x is not None else rng.uniform(0, 800)
+        self.y = y if y is not None else rng.uniform(0, 600)
         
         # Гены организма (если не переданы, генерируются случайно)
-        if genes is None:
-            self.genes = {
-                'speed': random.uniform(0.5, 3.0),           # Скорость передвижения
-                'size': random.uniform(2, 8),                # Размер организма
-                'energy_efficiency': random.uniform(0.3, 1.0), # Эффективность использования энергии
-                'reproduction_threshold': random.uniform(50, 100), # Порог размножения
-                'aggression': random.uniform(0.0, 1.0),      # Агрессивность (влияет на поведение)
-                'mutation_rate': random.uniform(0.01, 0.1),  # Частота мутаций
-                'color_r': random.randint(0, 255),           # Цвет (красный)
-                'color_g': random.randint(0, 255),           # Цвет (зеленый)  
-                'color_b': random.randint(0, 255),           # Цвет (синий)
-            }
-        else:
-            self.genes = genes.copy()
+        self.genes = random_genes(rng) if genes is None else genes
         
-        # Состояние организма
+        # Состояние организма (id назначает симуляция)
+        self.id = None
         self.energy = 100  # Увеличиваем начальную энергию
         self.age = 0
         self.alive = True
@@ -33,12 +144,32 @@ class Organism:
         self.fitness = 0  # Показатель приспособленности
         
         # Движение
-        self.direction = random.uniform(0, 2 * math.pi)
-        self.velocity_x = 0
-        self.velocity_y = 0
+        self.direction = rng.uniform(0, 2 * math.pi)
         
-    def update(self, dt, world_width, world_height, food_sources, other_organisms):
-        """Обновляет состояние организма на каждом шаге симуляции"""
+    @property
+    def genes(self):
+        """Гены в виде словаря {имя гена: значение} (копия)"""
+        genes = dict(zip(GENE_NAMES, self.gene_values))
+        for name in COLOR_GENES:
+            genes[name] = int(genes[name])
+        return genes
+        
+    @genes.setter
+    def genes(self, genes):
+        self.gene_values = array('d', [genes[name] for name in GENE_NAMES])
+        
+    def gene(self, name):
+        """Возвращает значение одного гена"""
+        return self.gene_values[GENE_INDEX[name]]
+        
+    def update(self, dt, world_width, world_height, food_sources, food_index=None, rng=random):
+        """Обновляет состояние организма на каждом шаге симуляции.
+
+        Если передан food_index, поиск пищи ограничивается ближайшими ячейками
+        (съеденная пища остается в сетке до очистки в начале следующего шага).
+        rng - генератор случайных поворотов при движении. Взаимодействия
+        с другими организмами выполняются отдельной фазой (см. interact).
+        """
         if not self.alive:
             return
             
@@ -46,39 +177,37 @@ class Organism:
         self.age += dt
         
         # Потребление энергии базовое (значительно уменьшено)
-        energy_consumption = (self.genes['size'] * 0.02 + self.genes['speed'] * 0.01) * dt
-        self.energy -= energy_consumption / self.genes['energy_efficiency']
+        genes = self.gene_values
+        energy_consumption = (genes[SIZE] * 0.02 + genes[SPEED] * 0.01) * dt
+        self.energy -= energy_consumption / genes[EFFICIENCY]
         
         # Расчёт приспособленности (больше энергии и возраста = лучше)
         self.fitness = self.energy * 0.1 + self.age * 0.05
         
         # Движение
-        self._move(dt, world_width, world_height)
+        self._move(dt, world_width, world_height, rng)
         
         # Поиск пищи
-        self._seek_food(food_sources)
-        
-        # Взаимодействие с другими организмами
-        self._interact_with_others(other_organisms)
+        self._seek_food(food_sources, food_index)
         
         # Проверка на смерть (увеличиваем продолжительность жизни)
         if self.energy <= 0 or self.age > 2000:
             self.alive = False
             
-    def _move(self, dt, world_width, world_height):
+    def _move(self, dt, world_width, world_height, rng=random):
         """Движение организма"""
         # Случайные изменения направления
-        if random.random() < 0.1:
-            self.direction += random.uniform(-0.5, 0.5)
+        if rng.random() < 0.1:
+            self.direction += rng.uniform(-0.5, 0.5)
             
         # Вычисляем скорость
-        speed = self.genes['speed']
-        self.velocity_x = math.cos(self.direction) * speed
-        self.velocity_y = math.sin(self.direction) * speed
+        speed = self.gene_values[SPEED]
+        velocity_x = math.cos(self.direction) * speed
+        velocity_y = math.sin(self.direction) * speed
         
         # Обновляем позицию
-        self.x += self.velocity_x * dt
-        self.y += self.velocity_y * dt
+        self.x += velocity_x * dt
+        self.y += velocity_y * dt
         
         # Отражение от границ
         if self.x < 0 or self.x > world_width:
@@ -89,76 +218,73 @@ class Organism:
             self.direction = -self.direction
             self.y = max(0, min(world_height, self.y))
             
-    def _seek_food(self, food_sources):
+    def _seek_food(self, food_sources, food_index=None):
         """Поиск и потребление пищи"""
+        size = self.gene_values[SIZE]
+        if food_index is not None:
+            food_sources = food_index.query(self.x, self.y, size + food_index.item_radius)
+            
         for food in food_sources:
             distance = math.sqrt((self.x - food['x'])**2 + (self.y - food['y'])**2)
-            if distance < self.genes['size'] + food['size']:
+            if distance < size + food['size']:
                 # Потребляем пищу (увеличиваем получение энергии)
-                energy_gain = food['energy'] * self.genes['energy_efficiency'] * 2.5
+                energy_gain = food['energy'] * self.gene_values[EFFICIENCY] * 2.5
                 self.energy += energy_gain
                 food['consumed'] = True
                 break
                 
-    def _interact_with_others(self, other_organisms):
-        """Взаимодействие с другими организмами"""
-        for other in other_organisms:
-            if other == self or not other.alive:
-                continue
-                
-            distance = math.sqrt((self.x - other.x)**2 + (self.y - other.y)**2)
+    def interact(self, other):
+        """Взаимодействие с другим организмом (вызывается один раз на пару за шаг).
+
+        Если оба организма агрессивны и касаются друг друга, происходит борьба:
+        побеждает больший size * speed, при равенстве - other. Победитель
+        получает 30% энергии проигравшего, проигравший теряет половину энергии.
+        Симуляция вызывает interact для пар по возрастанию (id self, id other),
+        где id self меньше, поэтому результат не зависит от способа поиска пар.
+        """
+        if not other.alive:
+            return
+        genes, other_genes = self.gene_values, other.gene_values
+        # Агрессивное взаимодействие
+        if genes[AGGRESSION] <= AGGRESSION_THRESHOLD or other_genes[AGGRESSION] <= AGGRESSION_THRESHOLD:
+            return
             
-            # Если организмы близко
-            if distance < self.genes['size'] + other.genes['size']:
-                # Агрессивное взаимодействие
-                if self.genes['aggression'] > 0.7 and other.genes['aggression'] > 0.7:
-                    # Борьба - более крупный и быстрый побеждает
-                    if self.genes['size'] * self.genes['speed'] > other.genes['size'] * other.genes['speed']:
-                        self.energy += other.energy * 0.3
-                        other.energy -= other.energy * 0.5
-                    else:
-                        other.energy += self.energy * 0.3
-                        self.energy -= self.energy * 0.5
+        distance = math.sqrt((self.x - other.x)**2 + (self.y - other.y)**2)
+        
+        # Если организмы близко
+        if distance < genes[SIZE] + other_genes[SIZE]:
+            # Борьба - более крупный и быстрый побеждает
+            if genes[SIZE] * genes[SPEED] > other_genes[SIZE] * other_genes[SPEED]:
+                self.energy += other.energy * 0.3
+                other.energy -= other.energy * 0.5
+            else:
+                other.energy += self.energy * 0.3
+                self.energy -= self.energy * 0.5
                         
+    def is_aggressive(self):
+        """Проверяет, участвует ли организм в боях"""
+        return self.gene_values[AGGRESSION] > AGGRESSION_THRESHOLD
+        
     def can_reproduce(self):
         """Проверяет, может ли организм размножаться"""
-        return self.energy > self.genes['reproduction_threshold'] and self.age > 100
+        return self.energy > self.gene_values[THRESHOLD] and self.age > 100
         
-    def reproduce(self):
+    def reproduce(self, rng=random):
         """Создает потомка с мутированными генами"""
         if not self.can_reproduce():
             return None
             
         # Тратим энергию на размножение (уменьшаем затраты)
-        self.energy -= self.genes['reproduction_threshold'] * 0.3
+        self.energy -= self.gene_values[THRESHOLD] * 0.3
         
         # Создаем мутированные гены
-        new_genes = {}
-        for gene_name, gene_value in self.genes.items():
-            if gene_name in ['color_r', 'color_g', 'color_b']:
-                # Цветовые гены мутируют по-особому
-                new_genes[gene_name] = max(0, min(255, int(gene_value + random.gauss(0, 20))))
-            else:
-                # Обычные гены мутируют с нормальным распределением
-                mutation_strength = self.genes['mutation_rate']
-                mutation = random.gauss(0, gene_value * mutation_strength)
-                new_genes[gene_name] = max(0.1, gene_value + mutation)
-                
-                # Ограничения на значения генов
-                if gene_name == 'speed':
-                    new_genes[gene_name] = min(5.0, new_genes[gene_name])
-                elif gene_name == 'size':
-                    new_genes[gene_name] = min(15.0, new_genes[gene_name])
-                elif gene_name in ['energy_efficiency', 'aggression']:
-                    new_genes[gene_name] = min(1.0, new_genes[gene_name])
-                elif gene_name == 'mutation_rate':
-                    new_genes[gene_name] = min(0.2, new_genes[gene_name])
+        new_genes = mutate_genes(self.genes, rng)
         
         # Создаем потомка рядом с родителем
-        child_x = self.x + random.uniform(-20, 20)
-        child_y = self.y + random.uniform(-20, 20)
+        child_x = self.x + rng.uniform(-20, 20)
+        child_y = self.y + rng.uniform(-20, 20)
         
-        child = Organism(child_x, child_y, new_genes)
+        child = Organism(child_x, child_y, new_genes, rng)
         child.generation = self.generation + 1
         child.energy = 60  # Увеличиваем начальную энергию потомка
         
@@ -166,10 +292,11 @@ class Organism:
         
     def get_color(self):
         """Возвращает цвет организма для отображения"""
+        genes = self.gene_values
         return (
-            int(self.genes['color_r']),
-            int(self.genes['color_g']),
-            int(self.genes['color_b'])
+            int(genes[GENE_INDEX['color_r']]),
+            int(genes[GENE_INDEX['color_g']]),
+            int(genes[GENE_INDEX['color_b']])
         )
         
     def get_info(self):
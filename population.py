@@ -0,0 +1,208 @@
+import numpy as np
+from organism import GENE_NAMES, COLOR_GENES, GENE_INDEX
+
+class Population:
+    """Популяция организмов в виде колонок массивов NumPy (structure of arrays)"""
+
+    # Колонки состояния организма и их типы
+    COLUMNS = {
+        'ids': np.int64,
+        'x': np.float64,
+        'y': np.float64,
+        'direction': np.float64,
+        'energy': np.float64,
+        'age': np.float64,
+        'fitness': np.float64,
+        'generation': np.int64,
+        'alive': np.bool_,
+    }
+
+    def __init__(self, capacity=64):
+        self.n = 0
+        self.capacity = capacity
+        self.next_id = 0
+
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        # Гены: строка на ген, чтобы каждая колонка гена лежала в памяти непрерывно
+        self.genes = np.zeros((len(GENE_NAMES), capacity), dtype=np.float64)
+
+    @classmethod
+    def from_columns(cls, columns, next_id):
+        """Создает популяцию поверх готовых колонок (без копирования, если типы совпадают)"""
+        n = len(columns['ids'])
+        pop = cls(capacity=0)
+        for name, dtype in cls.COLUMNS.items():
+            setattr(pop, name, np.ascontiguousarray(columns[name], dtype=dtype))
+        pop.genes = np.ascontiguousarray(columns['genes'], dtype=np.float64)
+        pop.n = pop.capacity = n
+        pop.next_id = next_id
+        return pop
+
+    def __len__(self):
+        return self.n
+
+    def _reserve(self, needed):
+        """Увеличивает емкость массивов (удвоением) до needed"""
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2)
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.n] = column[:self.n]
+            setattr(self, name, grown)
+        genes = np.zeros((len(GENE_NAMES), capacity), dtype=np.float64)
+        genes[:, :self.n] = self.genes[:, :self.n]
+        self.genes = genes
+        self.capacity = capacity
+
+    def gene(self, name):
+        """Возвращает колонку гена для живой части массива"""
+        return self.genes[GENE_INDEX[name], :self.n]
+
+    def append(self, x, y, genes, direction, energy, generation=0):
+        """Добавляет k организмов одной операцией, genes - массив (9, k)"""
+        k = len(x)
+        if k == 0:
+            return
+        start, end = self.n, self.n + k
+        self._reserve(end)
+
+        self.ids[start:end] = np.arange(self.next_id, self.next_id + k)
+        self.next_id += k
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.direction[start:end] = direction
+        self.energy[start:end] = energy
+        self.age[start:end] = 0
+        self.fitness[start:end] = 0
+        self.generation[start:end] = generation
+        self.alive[start:end] = True
+        self.genes[:, start:end] = genes
+        self.n = end
+
+    def clear(self):
+        """Удаляет все строки, сохраняя выделенные массивы и счетчик id"""
+        self.n = 0
+
+    def compact(self):
+        """Удаляет мертвых с сохранением порядка, возвращает число удаленных"""
+        n = self.n
+        keep = self.alive[:n].copy()
+        alive_count = int(np.count_nonzero(keep))
+        if alive_count == n:
+            return 0
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            column[:alive_count] = column[:n][keep]
+        self.genes[:, :alive_count] = self.genes[:, :n][:, keep]
+        self.n = alive_count
+        return n - alive_count
+
+    def row_of(self, organism_id):
+        """Возвращает строку организма по id или None.
+
+        Идентификаторы выдаются по возрастанию, а удаление сохраняет порядок,
+        поэтому колонка ids отсортирована и поиск выполняется бинарно.
+        """
+        row = int(np.searchsorted(self.ids[:self.n], organism_id))
+        if row < self.n and self.ids[row] == organism_id:
+            return row
+        return None
+
+class OrganismView:
+    """Представление одной строки Population с интерфейсом Organism (для GUI)"""
+
+    def __init__(self, population, row):
+        self.population = population
+        self.id = int(population.ids[row])
+        self._row = row
+
+    def _current_row(self):
+        """Находит актуальную строку организма (после удалений она сдвигается)"""
+        pop = self.population
+        row = self._row
+        if row >= pop.n or pop.ids[row] != self.id:
+            row = pop.row_of(self.id)
+            if row is None:
+                return None
+            self._row = row
+        return row
+
+    def _value(self, column, default=0):
+        row = self._current_row()
+        if row is None:
+            return default
+        return getattr(self.population, column)[row].item()
+
+    @property
+    def x(self):
+        return self._value('x')
+
+    @property
+    def y(self):
+        return self._value('y')
+
+    @property
+    def direction(self):
+        return self._value('direction')
+
+    @property
+    def energy(self):
+        return self._value('energy')
+
+    @property
+    def age(self):
+        return self._value('age')
+
+    @property
+    def fitness(self):
+        return self._value('fitness')
+
+    @property
+    def generation(self):
+        return self._value('generation')
+
+    @property
+    def alive(self):
+        return self._value('alive', False)
+
+    @property
+    def genes(self):
+        row = self._current_row()
+        if row is None:
+            return {name: 0 for name in GENE_NAMES}
+        values = self.population.genes[:, row].tolist()
+        genes = dict(zip(GENE_NAMES, values))
+        for name in COLOR_GENES:
+            genes[name] = int(genes[name])
+        return genes
+
+    def can_reproduce(self):
+        """Проверяет, может ли организм размножаться"""
+        return self.energy > self.genes['reproduction_threshold'] and self.age > 100
+
+    def get_color(self):
+        """Возвращает цвет организма для отображения"""
+        genes = self.genes
+        return (genes['color_r'], genes['color_g'], genes['color_b'])
+
+    def get_info(self):
+        """Возвращает информацию об организме"""
+        return {
+            'position': (self.x, self.y),
+            'energy': self.energy,
+            'age': self.age,
+            'generation': self.generation,
+            'genes': self.genes,
+            'alive': self.alive,
+            'fitness': self.fitness
+        }
+
+    def __eq__(self, other):
+        return (isinstance(other, OrganismView) and other.population is self.population
+                and other.id == self.id)
+
+    def __hash__(self):
+        return hash(self.id)
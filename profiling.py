@@ -0,0 +1,54 @@
+import time
+from array import array
+
+class PhaseTimers:
+    """Замеры длительности фаз шага симуляции.
+
+    Для каждой фазы хранятся длительности последних window замеров в кольцевом
+    буфере; процентили (p50, p95) и максимум считаются по этому скользящему окну
+    только при запросе сводки.
+    """
+
+    def __init__(self, window=500, clock=time.perf_counter):
+        if window <= 0:
+            raise ValueError("Размер окна замеров должен быть положительным")
+        self.window = window
+        self.clock = clock
+        # Фаза -> кольцевой буфер длительностей (в секундах) и число замеров
+        self._samples = {}
+        self._counts = {}
+
+    def measure(self, phase, func, *args):
+        """Вызывает func(*args) и записывает длительность вызова в фазу phase"""
+        start = self.clock()
+        result = func(*args)
+        self.add(phase, self.clock() - start)
+        return result
+
+    def add(self, phase, seconds):
+        """Добавляет замер фазы"""
+        samples = self._samples.get(phase)
+        if samples is None:
+            samples = self._samples[phase] = array('d', [0.0]) * self.window
+            self._counts[phase] = 0
+        count = self._counts[phase]
+        samples[count % self.window] = seconds
+        self._counts[phase] = count + 1
+
+    def summary(self):
+        """Возвращает {фаза: {count, mean, p50, p95, max}} по окну, длительности в мс"""
+        result = {}
+        for phase, samples in list(self._samples.items()):
+            count = self._counts[phase]
+            values = sorted(samples[:min(count, self.window)])
+            if not values:
+                continue
+            last = len(values) - 1
+            result[phase] = {
+                'count': count,
+                'mean': sum(values) / len(values) * 1000,
+                'p50': values[round(last * 0.5)] * 1000,
+                'p95': values[round(last * 0.95)] * 1000,
+                'max': values[-1] * 1000,
+            }
+        return result
@@ -0,0 +1,41 @@
+# Сколько лучших организмов отслеживается после каждого шага
+TOP_K = 10
+
+def top_rows(fitness, k):
+    """Строки k самых приспособленных по убыванию приспособленности (массив NumPy).
+
+    Отбор за O(n) через np.partition; при равной приспособленности выше
+    стоит строка с меньшим индексом, как при устойчивой сортировке.
+    """
+    import numpy as np
+
+    n = len(fitness)
+    if n > k:
+        # k-е по величине значение; все строки больше него входят целиком,
+        # а из равных ему берутся первые по порядку
+        threshold = -np.partition(-fitness, k - 1)[k - 1]
+        above = np.flatnonzero(fitness > threshold)
+        equal = np.flatnonzero(fitness == threshold)[:k - len(above)]
+        rows = np.concatenate((above, equal))
+    else:
+        rows = np.arange(n)
+    return rows[np.lexsort((rows, -fitness[rows]))]
+
+class FitnessRanking:
+    """Места организмов по приспособленности.
+
+    Приспособленность сортируется один раз при построении (раз за шаг),
+    после чего место любого значения находится бинарным поиском за O(log n).
+    """
+
+    def __init__(self, fitness):
+        import numpy as np
+
+        self._sorted = np.sort(np.asarray(fitness, dtype=np.float64))
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def rank(self, fitness):
+        """Место значения приспособленности (1 - лучший; равные делят место)"""
+        return len(self._sorted) - int(self._sorted.searchsorted(fitness, side='right')) + 1
@@ -0,0 +1,221 @@
+import tkinter as tk
+import numpy as np
+
+def rgb_to_hex(r, g, b):
+    """Преобразование RGB в hex"""
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+class CanvasRenderer:
+    """Отрисовка симуляции постоянными элементами Tk Canvas.
+
+    Для каждого организма и каждой порции пищи держится свой элемент канваса.
+    Каждый кадр элементы только двигаются (coords) и при смене стиля
+    перекрашиваются (itemconfig); создаются и удаляются они лишь при
+    рождении, смерти, появлении и поедании.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        # id организма -> [овал, фон полоски, полоска энергии, стиль]
+        self.organism_items = {}
+        # id пищи -> овал
+        self.food_items = {}
+
+    def clear(self):
+        """Удаляет все элементы (например, после сброса симуляции)"""
+        self.canvas.delete("all")
+        self.organism_items = {}
+        self.food_items = {}
+
+    def render(self, snapshot, selected_id=None):
+        """Отрисовывает кадр по снимку симуляции"""
+        self._render_food(snapshot.food)
+        self._render_organisms(snapshot.organisms, selected_id, set(snapshot.best_ids.tolist()))
+
+    def _render_food(self, food):
+        """Синхронизирует элементы пищи (пища не двигается)"""
+        canvas = self.canvas
+        items = self.food_items
+        visible = set()
+        created = False
+
+        for food_id, x, y, size in zip(food['ids'].tolist(), food['x'].tolist(),
+                                       food['y'].tolist(), food['size'].tolist()):
+            visible.add(food_id)
+            if food_id not in items:
+                items[food_id] = canvas.create_oval(x-size, y-size, x+size, y+size,
+                                                    fill='green', outline='darkgreen',
+                                                    tags=('food',))
+                created = True
+
+        for food_id in [food_id for food_id in items if food_id not in visible]:
+            canvas.delete(items.pop(food_id))
+
+        # Пища всегда рисуется под организмами
+        if created:
+            canvas.tag_lower('food')
+
+    def _render_organisms(self, organisms, selected_id, best_ids):
+        """Синхронизирует элементы организмов"""
+        canvas = self.canvas
+        items = self.organism_items
+        visible = set()
+
+        rows = zip(organisms['ids'].tolist(), organisms['x'].tolist(), organisms['y'].tolist(),
+                   organisms['size'].tolist(), organisms['energy'].tolist(),
+                   organisms['color'].tolist())
+        for organism_id, x, y, size, energy, color in rows:
+            visible.add(organism_id)
+
+            # Выделение выбранного и лучших организмов
+            if organism_id == selected_id:
+                outline, outline_width = 'yellow', 3
+            elif organism_id in best_ids:
+                outline, outline_width = 'lime', 2
+            else:
+                outline, outline_width = 'black', 1
+
+            # Полоска энергии над организмом
+            energy_ratio = min(1.0, energy / 100)
+            bar_width = size * 2
+            bar_x = x - bar_width / 2
+            bar_y = y - size - 8
+
+            entry = items.get(organism_id)
+            if entry is None:
+                oval = canvas.create_oval(x-size, y-size, x+size, y+size,
+                                          fill=rgb_to_hex(*color), outline=outline,
+                                          width=outline_width)
+                bar_bg = canvas.create_rectangle(bar_x, bar_y, bar_x + bar_width, bar_y + 3,
+                                                 fill='darkred', outline='')
+                bar = canvas.create_rectangle(bar_x, bar_y, bar_x + bar_width * energy_ratio,
+                                              bar_y + 3, fill='red', outline='')
+                items[organism_id] = [oval, bar_bg, bar, (outline, outline_width)]
+                continue
+
+            oval, bar_bg, bar, style = entry
+            canvas.coords(oval, x-size, y-size, x+size, y+size)
+            canvas.coords(bar_bg, bar_x, bar_y, bar_x + bar_width, bar_y + 3)
+            canvas.coords(bar, bar_x, bar_y, bar_x + bar_width * energy_ratio, bar_y + 3)
+            if style != (outline, outline_width):
+                canvas.itemconfig(oval, outline=outline, width=outline_width)
+                entry[3] = (outline, outline_width)
+
+        for organism_id in [organism_id for organism_id in items if organism_id not in visible]:
+            oval, bar_bg, bar, _ = items.pop(organism_id)
+            canvas.delete(oval, bar_bg, bar)
+
+def pack_rgb(r, g, b):
+    """Упаковывает цвет в 32-битное значение пикселя (байты r, g, b, 0)"""
+    return r | (g << 8) | (b << 16)
+
+class RasterRenderer:
+    """Растровая отрисовка больших популяций.
+
+    Организмы, пища и полоски энергии рисуются векторно (NumPy) в один
+    буфер пикселей, который раз в кадр передается на канвас одним
+    tk.PhotoImage. Круги рисуются штампами: все организмы с одинаковым
+    (округленным) радиусом закрашиваются одной операцией.
+    """
+
+    BACKGROUND = pack_rgb(0x00, 0x11, 0x22)
+    FOOD_COLOR = pack_rgb(0x00, 0x80, 0x00)
+    BAR_BACKGROUND = pack_rgb(0x8b, 0x00, 0x00)
+    BAR_COLOR = pack_rgb(0xff, 0x00, 0x00)
+    SELECTED_COLOR = pack_rgb(0xff, 0xff, 0x00)
+    BEST_COLOR = pack_rgb(0x00, 0xff, 0x00)
+
+    def __init__(self, canvas, width, height):
+        self.canvas = canvas
+        self.width = width
+        self.height = height
+        # Пиксель - одно 32-битное число, запись цвета - одно присваивание
+        self.pixels = np.empty(width * height, dtype='<u4')
+        self._header = f"P6 {width} {height} 255 ".encode()
+        self._stamps = {}
+        self._image_item = None
+        self._photo = None
+
+    def clear(self):
+        """Удаляет изображение с канваса"""
+        if self._image_item is not None:
+            self.canvas.delete(self._image_item)
+        self._image_item = None
+        self._photo = None
+
+    def _disk(self, radius):
+        """Смещения пикселей круга заданного радиуса (кэшируются)"""
+        stamp = self._stamps.get(radius)
+        if stamp is None:
+            dy, dx = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+            inside = dx * dx + dy * dy <= radius * radius
+            stamp = (dy[inside], dx[inside])
+            self._stamps[radius] = stamp
+        return stamp
+
+    def _fill(self, yy, xx, colors):
+        """Закрашивает пиксели (yy, xx), отбрасывая вышедшие за границы"""
+        inside = (yy >= 0) & (yy < self.height) & (xx >= 0) & (xx < self.width)
+        if np.ndim(colors):
+            colors = np.broadcast_to(colors, yy.shape)[inside]
+        self.pixels[yy[inside] * self.width + xx[inside]] = colors
+
+    def _draw_disks(self, x, y, radius, colors):
+        """Рисует круги, группируя их по округленному радиусу"""
+        radius = np.maximum(np.rint(radius).astype(np.int64), 1)
+        cx = np.rint(x).astype(np.int64)
+        cy = np.rint(y).astype(np.int64)
+        per_item = np.ndim(colors) > 0
+        for r in np.unique(radius).tolist():
+            group = np.flatnonzero(radius == r)
+            dy, dx = self._disk(r)
+            self._fill(cy[group, None] + dy, cx[group, None] + dx,
+                       colors[group, None] if per_item else colors)
+
+    def _draw_energy_bars(self, x, y, size, energy):
+        """Рисует полоски энергии над организмами"""
+        half = np.maximum(np.rint(size).astype(np.int64), 1)
+        left = np.rint(x).astype(np.int64) - half
+        top = np.rint(y - size).astype(np.int64) - 8
+        filled = np.rint(np.minimum(1.0, energy / 100) * 2 * half).astype(np.int64)
+        for h in np.unique(half).tolist():
+            group = np.flatnonzero(half == h)
+            dy, dx = np.mgrid[0:3, 0:2 * h]
+            dy, dx = dy.ravel(), dx.ravel()
+            colors = np.where(dx < filled[group, None], self.BAR_COLOR, self.BAR_BACKGROUND)
+            self._fill(top[group, None] + dy, left[group, None] + dx, colors.astype('<u4'))
+
+    def render(self, snapshot, selected_id=None):
+        """Отрисовывает кадр по снимку симуляции"""
+        organisms = snapshot.organisms
+        food = snapshot.food
+        self.pixels[:] = self.BACKGROUND
+
+        if len(food['x']):
+            self._draw_disks(food['x'], food['y'], food['size'], self.FOOD_COLOR)
+
+        # Обводка выделенных организмов - круг чуть большего радиуса под организмом
+        best = snapshot.best_rows
+        if len(best):
+            self._draw_disks(organisms['x'][best], organisms['y'][best],
+                             organisms['size'][best] + 2, self.BEST_COLOR)
+        selected = snapshot.row_of(selected_id)
+        if selected is not None:
+            self._draw_disks(organisms['x'][[selected]], organisms['y'][[selected]],
+                             organisms['size'][[selected]] + 3, self.SELECTED_COLOR)
+
+        if len(organisms['x']):
+            color = organisms['color'].astype('<u4')
+            packed = pack_rgb(color[:, 0], color[:, 1], color[:, 2])
+            self._draw_disks(organisms['x'], organisms['y'], organisms['size'], packed)
+            self._draw_energy_bars(organisms['x'], organisms['y'], organisms['size'],
+                                   organisms['energy'])
+
+        # Один PhotoImage на кадр (PPM: по три байта на пиксель)
+        rgb = self.pixels.view(np.uint8).reshape(self.height, self.width, 4)[:, :, :3]
+        self._photo = tk.PhotoImage(width=self.width, height=self.height,
+                                    data=self._header + rgb.tobytes(), format='PPM')
+        if self._image_item is None:
+            self._image_item = self.canvas.create_image(0, 0, image=self._photo, anchor='nw')
+        else:
+            self.canvas.itemconfig(self._image_item, image=self._photo)
@@ -0,0 +1,101 @@
+# Гены, по которым считаются средние значения в статистике
+STAT_GENES = ('speed', 'size', 'energy_efficiency', 'aggression', 'mutation_rate')
+
+class RunningStats:
+    """Накопительные суммы по живой популяции.
+
+    Суммы обновляются при рождении и смерти организмов, поэтому средние
+    значения доступны за O(1) без прохода по всей популяции.
+    Сумма приспособленности пересчитывается в цикле обновления организмов,
+    где приспособленность и так вычисляется заново.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Обнуляет все суммы"""
+        self._clear_sums()
+        # Максимальное поколение за всё время (при смерти не уменьшается)
+        self.max_generation = 0
+
+    def _clear_sums(self):
+        """Обнуляет суммы по популяции (но не максимальное поколение)"""
+        self.count = 0
+        self.gene_sums = dict.fromkeys(STAT_GENES, 0.0)
+        self.generation_sum = 0
+        self.fitness_sum = 0.0
+
+    def add_organism(self, organism):
+        """Учитывает родившийся организм"""
+        gene_sums = self.gene_sums
+        for gene_name in STAT_GENES:
+            gene_sums[gene_name] += organism.gene(gene_name)
+        self.count += 1
+        self.generation_sum += organism.generation
+        self.fitness_sum += organism.fitness
+        if organism.generation > self.max_generation:
+            self.max_generation = organism.generation
+
+    def remove_organism(self, organism):
+        """Исключает умерший организм"""
+        gene_sums = self.gene_sums
+        for gene_name in STAT_GENES:
+            gene_sums[gene_name] -= organism.gene(gene_name)
+        self.count -= 1
+        self.generation_sum -= organism.generation
+        self.fitness_sum -= organism.fitness
+        # После вымирания убираем накопившуюся погрешность сумм
+        if self.count == 0:
+            self._clear_sums()
+
+    def add_totals(self, count, gene_sums, generation_sum, fitness_sum, max_generation):
+        """Учитывает сразу группу организмов по их суммам"""
+        for gene_name in STAT_GENES:
+            self.gene_sums[gene_name] += gene_sums[gene_name]
+        self.count += count
+        self.generation_sum += generation_sum
+        self.fitness_sum += fitness_sum
+        if max_generation > self.max_generation:
+            self.max_generation = max_generation
+
+    def remove_totals(self, count, gene_sums, generation_sum, fitness_sum):
+        """Исключает группу организмов по их суммам"""
+        for gene_name in STAT_GENES:
+            self.gene_sums[gene_name] -= gene_sums[gene_name]
+        self.count -= count
+        self.generation_sum -= generation_sum
+        self.fitness_sum -= fitness_sum
+        if self.count == 0:
+            self._clear_sums()
+
+    def get_state(self):
+        """Возвращает суммы в виде словаря (для сохранения)"""
+        return {
+            'count': self.count,
+            'gene_sums': dict(self.gene_sums),
+            'generation_sum': self.generation_sum,
+            'fitness_sum': self.fitness_sum,
+            'max_generation': self.max_generation,
+        }
+
+    def set_state(self, state):
+        """Восстанавливает суммы, полученные из get_state"""
+        self.count = state['count']
+        self.gene_sums = dict(state['gene_sums'])
+        self.generation_sum = state['generation_sum']
+        self.fitness_sum = state['fitness_sum']
+        self.max_generation = state['max_generation']
+
+    def averages(self):
+        """Возвращает средние значения в формате словаря статистики"""
+        count = self.count
+        return {
+            'avg_speed': self.gene_sums['speed'] / count,
+            'avg_size': self.gene_sums['size'] / count,
+            'avg_energy_efficiency': self.gene_sums['energy_efficiency'] / count,
+            'avg_generation': self.generation_sum / count,
+            'avg_aggression': self.gene_sums['aggression'] / count,
+            'avg_mutation_rate': self.gene_sums['mutation_rate'] / count,
+            'avg_fitness': self.fitness_sum / count,
+        }
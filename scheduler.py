@@ -0,0 +1,82 @@
+import time
+
+class StepScheduler:
+    """Планировщик шагов симуляции с фиксированным dt.
+
+    Скорость задает число шагов в секунду (base_rate * speed), а не величину dt.
+    Каждый такт планировщик выполняет столько шагов, сколько накопилось
+    к текущему моменту, но не дольше budget секунд. Если шаги не успевают
+    выполняться, планировщик не спит, а отмечает отставание (behind);
+    долг сверх max_backlog секунд отбрасывается и учитывается в dropped_steps.
+    """
+
+    def __init__(self, step, step_dt=1.0, base_rate=20.0, budget=0.05, max_backlog=1.0,
+                 clock=time.perf_counter, sleep=time.sleep):
+        self.step = step
+        self.step_dt = step_dt
+        self.base_rate = base_rate
+        self.budget = budget
+        self.max_backlog = max_backlog
+        self.clock = clock
+        self.sleep = sleep
+        self.speed = 1.0
+
+        # Состояние и показатели
+        self.backlog = 0.0        # Накопленный долг в шагах
+        self.behind = False       # Не успевает за заданной скоростью
+        self.dropped_steps = 0    # Пропущено шагов из-за отставания
+        self.measured_rate = 0.0  # Фактических шагов в секунду
+        self._last = None
+        self._window_start = None
+        self._window_steps = 0
+
+    @property
+    def target_rate(self):
+        """Требуемое число шагов в секунду"""
+        return self.base_rate * self.speed
+
+    def tick(self):
+        """Выполняет один такт и возвращает паузу до следующего (0 при отставании)"""
+        now = self.clock()
+        if self._last is None:
+            self._last = self._window_start = now
+        rate = self.target_rate
+        self.backlog += (now - self._last) * rate
+        self._last = now
+
+        # Шаги в пределах бюджета времени
+        deadline = now + self.budget
+        while self.backlog >= 1.0:
+            self.step(self.step_dt)
+            self.backlog -= 1.0
+            self._window_steps += 1
+            if self.clock() >= deadline:
+                break
+
+        # Долг, который уже не наверстать, отбрасывается
+        max_backlog = max(1.0, rate * self.max_backlog)
+        if self.backlog > max_backlog:
+            self.dropped_steps += int(self.backlog - max_backlog)
+            self.backlog = max_backlog
+        self.behind = self.backlog >= 1.0
+
+        # Фактическая скорость по окну в полсекунды
+        now = self.clock()
+        if now - self._window_start >= 0.5:
+            self.measured_rate = self._window_steps / (now - self._window_start)
+            self._window_start = now
+            self._window_steps = 0
+
+        if self.behind:
+            return 0.0
+        # Спим до следующего шага, но недолго, чтобы быстро реагировать на смену скорости
+        return min(0.05, max(0.001, (1.0 - self.backlog) / rate))
+
+    def run(self, running):
+        """Выполняет шаги, пока running() возвращает True"""
+        self._last = None
+        self.backlog = 0.0
+        while running():
+            delay = self.tick()
+            if delay > 0:
+                self.sleep(delay)
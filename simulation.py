@@ -1,25 +1,93 @@
+import heapq
+import math
 import random
 import time
-from organism import Organism
+from itertools import compress
+from operator import attrgetter
+from organism import (Organism, organisms_from_columns, GENE_NAMES, GENE_MAX_VALUES, SIZE,
+                      AGGRESSION, AGGRESSION_THRESHOLD)
+from spatial import SpatialHash
+from running_stats import RunningStats
+from history import GeneHistory, HISTORY_KEYS
+from profiling import PhaseTimers
+from ranking import TOP_K
+
+# Доступные движки симуляции
+ENGINES = ('python', 'numpy')
+
+# Независимые потоки случайных чисел по подсистемам: начальная популяция
+# (и повторное заселение), появление пищи, повороты при движении,
+# размножение (мутации и положение потомка)
+RNG_STREAMS = ('spawn', 'food', 'movement', 'mutation')
+
+def create_simulation(width=800, height=600, engine='python', **options):
+    """Создает симуляцию с выбранным движком.
+
+    'python' - организмы как отдельные объекты Organism,
+    'numpy' - популяция хранится в колонках массивов NumPy.
+    Остальные параметры передаются в конструктор симуляции.
+    """
+    if engine == 'python':
+        return EvolutionSimulation(width, height, **options)
+    if engine == 'numpy':
+        from numpy_simulation import NumpySimulation
+        return NumpySimulation(width, height, **options)
+    raise ValueError(f"Неизвестный движок симуляции: {engine}")
+
+def _gene_matrix(organisms):
+    """Гены организмов в виде массива NumPy (9, n): байты gene_values подряд"""
+    import numpy as np
+    
+    data = b''.join([org.gene_values.tobytes() for org in organisms])
+    return np.frombuffer(data, dtype=np.float64).reshape(len(organisms), len(GENE_NAMES)).T
+
+def _run_phase(phase, func, *args):
+    """Вызывает фазу шага без замера времени (замеры выключены)"""
+    return func(*args)
 
 class EvolutionSimulation:
     """Основной класс симуляции эволюции"""
     
-    def __init__(self, width=800, height=600):
+    # Имя движка (см. create_simulation)
+    engine = 'python'
+    
+    def __init__(self, width=800, height=600, history_capacity=1000, history_overview_size=200,
+                 snapshots=False, max_substep_dt=1.0, seed=None):
         self.width = width
         self.height = height
         
+        # Зерно прогона: одинаковые зерно и настройки дают одинаковую траекторию.
+        # Без зерна оно берется из модуля random (и запоминается в self.seed)
+        self.fixed_seed = seed
+        self._seed_streams(seed)
+        
         # Параметры симуляции
-        self.organisms = []
+        self.organisms = self._create_organisms()
+        # id -> живой организм: поиск по id без прохода по списку
+        self.organisms_by_id = {}
         self.food_sources = []
         self.generation_count = 0
         self.time_step = 0
+        self.next_organism_id = 0
         
         # Настройки симуляции
         self.max_organisms = None  # Убираем ограничение популяции
         self.initial_organisms = 20
         self.food_spawn_rate = 0.5  # Увеличиваем частоту появления пищи
         self.max_food = 80  # Больше пищи
+        # Большой dt делится на подшаги не длиннее этого значения (None - без деления),
+        # чтобы быстрые организмы не перескакивали через пищу и друг друга
+        self.max_substep_dt = max_substep_dt
+        
+        # Пространственный индекс для взаимодействия организмов: в боях участвуют
+        # только агрессивные, поэтому в сетке только они (добавляются при рождении,
+        # удаляются при смерти). Ячейка вмещает контакт двух организмов
+        # максимального размера, item_radius - наибольший размер в сетке
+        self.use_spatial_index = True
+        self.aggressive_index = SpatialHash(cell_size=2 * GENE_MAX_VALUES['size'])
+        # Сетка пищи (максимальный размер пищи - 5)
+        self.food_index = SpatialHash(cell_size=20.0, item_radius=5.0)
+        self.next_food_id = 0
         
         # Статистика
         self.stats = {
@@ -34,131 +102,322 @@ class EvolutionSimulation:
             'total_births': 0,
             'total_deaths': 0
         }
+        # Накопительные суммы для статистики (обновляются при рождении и смерти)
+        self.running_stats = RunningStats()
         
-        # История изменений генов для графиков
-        self.gene_history = {
-            'speed': [],
-            'size': [],
-            'energy_efficiency': [],
-            'aggression': [],
-            'mutation_rate': [],
-            'fitness': []
-        }
+        # История изменений генов для графиков (ограниченный кольцевой буфер)
+        self.gene_history = GeneHistory(history_capacity, history_overview_size)
+        
+        # Снимки состояния для GUI (публикуются после каждого шага)
+        self.publish_snapshots = snapshots
+        self.latest_snapshot = None
+        
+        # Замеры длительности фаз шага (None - выключены)
+        self.phase_timers = None
+        
+        # TOP_K лучших по приспособленности (обновляются один раз за шаг)
+        self.top_organisms = []
+        # Снимок текущего шага для get_rank и find_nearest_organism
+        # (опубликованный или собранный при первом запросе после шага)
+        self._query_snapshot = None
         
         # Инициализация
         self._spawn_initial_organisms()
+        self._update_rankings()
+        if self.publish_snapshots:
+            self._publish_snapshot()
+        
+    def _seed_streams(self, seed=None):
+        """Создает потоки случайных чисел подсистем из зерна"""
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.rng = self._create_streams(seed)
+        
+    def _create_streams(self, seed):
+        """Потоки случайных чисел {подсистема: random.Random}, независимые друг от друга"""
+        return {name: random.Random(f"{seed}:{name}") for name in RNG_STREAMS}
+        
+    def _create_organisms(self):
+        """Пустое хранилище организмов (список; в движке NumPy - Population)"""
+        return []
         
     def _spawn_initial_organisms(self):
         """Создает начальную популяцию организмов"""
-        self.organisms = []
+        self.organisms.clear()
+        rng = self.rng['spawn']
         for _ in range(self.initial_organisms):
-            organism = Organism()
-            organism.x = random.uniform(50, self.width - 50)
-            organism.y = random.uniform(50, self.height - 50)
+            organism = Organism(rng.uniform(50, self.width - 50),
+                                rng.uniform(50, self.height - 50), rng=rng)
+            self._register_organism(organism)
             self.organisms.append(organism)
             
+    def _register_organism(self, organism):
+        """Выдает id новому организму и учитывает его в суммах и индексах"""
+        organism.id = self.next_organism_id
+        self.next_organism_id += 1
+        self.running_stats.add_organism(organism)
+        self._index_organism(organism)
+        
+    def _index_organism(self, organism):
+        """Добавляет организм в индекс по id и, если он участвует в боях, в сетку агрессивных"""
+        self.organisms_by_id[organism.id] = organism
+        if organism.is_aggressive():
+            index = self.aggressive_index
+            index.insert(organism, organism.x, organism.y)
+            index.item_radius = max(index.item_radius, organism.gene_values[SIZE])
+            
     def _spawn_food(self):
         """Создает источники пищи"""
-        # Удаляем съеденную пищу
-        self.food_sources = [food for food in self.food_sources if not food.get('consumed', False)]
+        # Удаляем съеденную пищу (и из сетки пищи, даже если сетка не использовалась)
+        food_sources = self.food_sources
+        write = 0
+        for food in food_sources:
+            if food['consumed']:
+                self.food_index.remove(food['id'])
+            else:
+                food_sources[write] = food
+                write += 1
+        del food_sources[write:]
         
         # Добавляем новую пищу
-        while len(self.food_sources) < self.max_food and random.random() < self.food_spawn_rate:
+        rng = self.rng['food']
+        while len(self.food_sources) < self.max_food and rng.random() < self.food_spawn_rate:
             food = {
-                'x': random.uniform(10, self.width - 10),
-                'y': random.uniform(10, self.height - 10),
-                'size': random.uniform(2, 5),
-                'energy': random.uniform(10, 25),
+                'id': self.next_food_id,
+                'x': rng.uniform(10, self.width - 10),
+                'y': rng.uniform(10, self.height - 10),
+                'size': rng.uniform(2, 5),
+                'energy': rng.uniform(10, 25),
                 'consumed': False
             }
             self.food_sources.append(food)
+            self.food_index.insert(food['id'], food['x'], food['y'], food)
+            self.next_food_id += 1
             
     def _handle_reproduction(self):
         """Обрабатывает размножение организмов"""
         new_organisms = []
+        rng = self.rng['mutation']
         
         for organism in self.organisms:
             if organism.alive and organism.can_reproduce():
                 # Размножение без ограничений (естественный отбор сам регулирует)
-                child = organism.reproduce()
+                child = organism.reproduce(rng)
                 if child:
                     # Проверяем границы для потомка
                     child.x = max(10, min(self.width - 10, child.x))
                     child.y = max(10, min(self.height - 10, child.y))
+                    self._register_organism(child)
                     new_organisms.append(child)
                     self.stats['total_births'] += 1
                         
         self.organisms.extend(new_organisms)
         
     def _remove_dead_organisms(self):
-        """Удаляет мертвых организмов"""
-        dead_count = sum(1 for org in self.organisms if not org.alive)
-        self.stats['total_deaths'] += dead_count
-        self.organisms = [org for org in self.organisms if org.alive]
+        """Удаляет мертвых организмов.
+
+        Живые сдвигаются к началу того же списка за один проход, а хвост
+        отрезается, поэтому порядок (по возрастанию id) сохраняется и новый
+        список не создается.
+        """
+        organisms = self.organisms
+        write = 0
+        for organism in organisms:
+            if organism.alive:
+                organisms[write] = organism
+                write += 1
+            else:
+                self.running_stats.remove_organism(organism)
+                self.aggressive_index.remove(organism)
+                del self.organisms_by_id[organism.id]
+        self.stats['total_deaths'] += len(organisms) - write
+        del organisms[write:]
         
     def _update_statistics(self):
-        """Обновляет статистику симуляции"""
-        if len(self.organisms) == 0:
-            return
-            
-        alive_organisms = [org for org in self.organisms if org.alive]
-        
-        if len(alive_organisms) == 0:
+        """Обновляет статистику симуляции по накопительным суммам"""
+        if self.running_stats.count == 0:
             return
             
-        self.stats['population'] = len(alive_organisms)
-        self.stats['avg_speed'] = sum(org.genes['speed'] for org in alive_organisms) / len(alive_organisms)
-        self.stats['avg_size'] = sum(org.genes['size'] for org in alive_organisms) / len(alive_organisms)
-        self.stats['avg_energy_efficiency'] = sum(org.genes['energy_efficiency'] for org in alive_organisms) / len(alive_organisms)
-        self.stats['avg_generation'] = sum(org.generation for org in alive_organisms) / len(alive_organisms)
-        self.stats['avg_aggression'] = sum(org.genes['aggression'] for org in alive_organisms) / len(alive_organisms)
-        self.stats['avg_mutation_rate'] = sum(org.genes['mutation_rate'] for org in alive_organisms) / len(alive_organisms)
-        self.stats['avg_fitness'] = sum(org.fitness for org in alive_organisms) / len(alive_organisms)
+        self.stats['population'] = self.running_stats.count
+        self.stats.update(self.running_stats.averages())
         
         # Сохраняем историю для графиков (каждые 10 шагов)
         if self.time_step % 10 == 0:
-            self.gene_history['speed'].append(self.stats['avg_speed'])
-            self.gene_history['size'].append(self.stats['avg_size'])
-            self.gene_history['energy_efficiency'].append(self.stats['avg_energy_efficiency'])
-            self.gene_history['aggression'].append(self.stats['avg_aggression'])
-            self.gene_history['mutation_rate'].append(self.stats['avg_mutation_rate'])
-            self.gene_history['fitness'].append(self.stats['avg_fitness'])
+            self.gene_history.append({
+                'speed': self.stats['avg_speed'],
+                'size': self.stats['avg_size'],
+                'energy_efficiency': self.stats['avg_energy_efficiency'],
+                'aggression': self.stats['avg_aggression'],
+                'mutation_rate': self.stats['avg_mutation_rate'],
+                'fitness': self.stats['avg_fitness'],
+            })
         
         # Определяем новое поколение
-        max_generation = max(org.generation for org in alive_organisms)
+        max_generation = self.running_stats.max_generation
         if max_generation > self.generation_count:
             self.generation_count = max_generation
             
+    def _update_organisms(self, dt):
+        """Обновляет всех организмов на один шаг"""
+        food_index = self.food_index if self.use_spatial_index else None
+            
+        # Сумма приспособленности пересчитывается здесь же, без отдельного прохода
+        fitness_sum = 0.0
+        rng = self.rng['movement']
+        for organism in self.organisms:
+            organism.update(dt, self.width, self.height, self.food_sources, food_index, rng)
+            fitness_sum += organism.fitness
+        self.running_stats.fitness_sum = fitness_sum
+        
+    def _resolve_interactions(self):
+        """Взаимодействия организмов после движения: каждая пара один раз.
+
+        Пары обрабатываются по возрастанию (меньший id, больший id): список
+        организмов упорядочен по id, а сетка возвращает соседей в порядке
+        вставки. Поэтому перебор через сетку и полный перебор дают одинаковый
+        результат, а передача энергии в боях детерминирована (см. Organism.interact).
+        Через сетку перебираются только агрессивные организмы.
+        """
+        organisms = self.organisms
+        if self.use_spatial_index:
+            index = self.aggressive_index
+            aggressive = list(index)
+            for organism in aggressive:
+                index.move(organism, organism.x, organism.y)
+            for organism in aggressive:
+                if not organism.alive:
+                    continue
+                for other in index.query(organism.x, organism.y,
+                                         organism.gene_values[SIZE] + index.item_radius):
+                    if other.id > organism.id:
+                        organism.interact(other)
+        else:
+            for i, organism in enumerate(organisms):
+                if not organism.alive:
+                    continue
+                for other in organisms[i + 1:]:
+                    organism.interact(other)
+            
     def update(self, dt=1.0):
-        """Обновляет состояние симуляции на один шаг"""
+        """Обновляет состояние симуляции на время dt.
+
+        Если dt больше max_substep_dt, выполняется несколько равных подшагов
+        (каждый считается отдельным шагом в time_step), иначе - один шаг.
+        """
+        substeps = 1
+        if self.max_substep_dt and dt > self.max_substep_dt:
+            substeps = math.ceil(dt / self.max_substep_dt)
+        run = self.phase_timers.measure if self.phase_timers is not None else _run_phase
+        for _ in range(substeps):
+            run('step', self._step, dt / substeps)
+            
+        if self.publish_snapshots:
+            run('snapshot', self._publish_snapshot)
+            
+    def _step(self, dt):
+        """Выполняет один шаг симуляции"""
         self.time_step += 1
+        run = self.phase_timers.measure if self.phase_timers is not None else _run_phase
         
         # Создаем пищу
-        self._spawn_food()
+        run('spawn_food', self._spawn_food)
         
         # Обновляем всех организмов
-        for organism in self.organisms:
-            organism.update(dt, self.width, self.height, self.food_sources, self.organisms)
-            
+        run('organisms', self._update_organisms, dt)
+        
+        # Взаимодействия между организмами (после движения всех)
+        run('interactions', self._resolve_interactions)
+        
         # Обрабатываем размножение
-        self._handle_reproduction()
+        run('reproduction', self._handle_reproduction)
         
         # Удаляем мертвых
-        self._remove_dead_organisms()
+        run('remove_dead', self._remove_dead_organisms)
         
         # Обновляем статистику
-        self._update_statistics()
+        run('statistics', self._update_statistics)
         
         # Если популяция вымерла, перезапускаем
         if len(self.organisms) == 0:
             self._spawn_initial_organisms()
             
-    def reset(self):
-        """Сбрасывает симуляцию к начальному состоянию"""
-        self.organisms = []
-        self.food_sources = []
+        # Лучшие организмы по итогам шага
+        run('ranking', self._update_rankings)
+        
+    def _update_rankings(self):
+        """Отбирает TOP_K лучших организмов по приспособленности за O(n log k)"""
+        alive = (org for org in self.organisms if org.alive)
+        self.top_organisms = heapq.nlargest(TOP_K, alive, key=attrgetter('fitness'))
+        self._clear_query_caches()
+        
+    def _clear_query_caches(self):
+        """Сбрасывает снимок запросов, собранный по прошлому шагу"""
+        self._query_snapshot = None
+        
+    def _current_snapshot(self):
+        """Снимок текущего шага для запросов.
+
+        После update с публикацией снимков это опубликованный снимок, поэтому
+        места и сетка строятся один раз на шаг и для GUI, и для запросов
+        к симуляции; иначе снимок собирается при первом запросе после шага.
+        """
+        if self._query_snapshot is None:
+            self._query_snapshot = self._build_snapshot()
+        return self._query_snapshot
+        
+    def get_rank(self, organism):
+        """Возвращает место организма по приспособленности (1 - лучший) за O(log n).
+
+        Отсортированная приспособленность строится один раз после шага,
+        при первом запросе (см. Snapshot.ranking).
+        """
+        return self._current_snapshot().ranking.rank(organism.fitness)
+        
+    def find_nearest_organism(self, x, y, max_distance=20):
+        """Возвращает ближайший к точке организм в пределах max_distance или None.
+
+        Сетка позиций строится один раз после шага, при первом запросе
+        (см. Snapshot.grid), после чего запрос просматривает только ближайшие ячейки.
+        """
+        snapshot = self._current_snapshot()
+        row = snapshot.nearest(x, y, max_distance)
+        return None if row is None else self.get_organism(int(snapshot.organisms['ids'][row]))
+            
+    def _publish_snapshot(self):
+        """Собирает новый снимок и публикует его заменой ссылки.
+
+        Замена ссылки атомарна, поэтому читающий поток видит либо старый,
+        либо новый снимок целиком и не нуждается в блокировках.
+        """
+        self.latest_snapshot = self._query_snapshot = self._build_snapshot()
+        
+    def _build_snapshot(self):
+        """Собирает снимок текущего состояния"""
+        from snapshot import Snapshot
+        
+        top_ids = [organism.id for organism in self.top_organisms]
+        return Snapshot(self.time_step, self.stats, self.get_organism_arrays(),
+                        self.get_food_arrays(), top_ids)
+            
+    def reset(self, seed=None):
+        """Сбрасывает симуляцию к начальному состоянию.
+
+        Потоки случайных чисел создаются заново из seed, а без него - из зерна,
+        переданного в конструктор (если его не было, выбирается новое зерно).
+        """
+        if seed is not None:
+            self.fixed_seed = seed
+        self._seed_streams(self.fixed_seed)
+        self.organisms.clear()
+        self.organisms_by_id.clear()
+        self.food_sources.clear()
+        self.food_index.reset()
+        self.aggressive_index.reset(item_radius=0.0)
+        self.next_food_id = 0
         self.generation_count = 0
         self.time_step = 0
+        self.next_organism_id = 0
         self.stats = {
             'population': 0,
             'avg_speed': 0,
@@ -172,25 +431,153 @@ class EvolutionSimulation:
             'total_deaths': 0
         }
         # Очищаем историю генов
-        for key in self.gene_history:
-            self.gene_history[key] = []
+        self.gene_history.clear()
+        self.running_stats.reset()
         self._spawn_initial_organisms()
+        self._update_rankings()
+        if self.publish_snapshots:
+            self._publish_snapshot()
+        
+    def enable_profiling(self, window=500):
+        """Включает замеры фаз шага по скользящему окну последних window шагов"""
+        self.phase_timers = PhaseTimers(window)
+        
+    def disable_profiling(self):
+        """Выключает замеры фаз шага"""
+        self.phase_timers = None
+        
+    def get_phase_timings(self):
+        """Возвращает сводку замеров фаз шага: {фаза: {count, mean, p50, p95, max}} в мс"""
+        if self.phase_timers is None:
+            return {}
+        return self.phase_timers.summary()
+        
+    def save_checkpoint(self, path):
+        """Сохраняет полное состояние симуляции в файл (см. checkpoint.save_checkpoint)"""
+        from checkpoint import save_checkpoint
+        save_checkpoint(self, path)
         
-    def set_parameters(self, initial_organisms=None, food_spawn_rate=None):
+    def load_checkpoint(self, path):
+        """Загружает состояние симуляции из файла сохранения"""
+        from checkpoint import restore_checkpoint
+        restore_checkpoint(self, path)
+        
+    def _organism_columns(self):
+        """Колонки организмов для сохранения и следующий свободный id"""
+        import numpy as np
+        
+        organisms = self.organisms
+        count = len(organisms)
+        columns = {
+            'ids': np.fromiter((org.id for org in organisms), np.int64, count),
+            'x': np.fromiter((org.x for org in organisms), np.float64, count),
+            'y': np.fromiter((org.y for org in organisms), np.float64, count),
+            'direction': np.fromiter((org.direction for org in organisms), np.float64, count),
+            'energy': np.fromiter((org.energy for org in organisms), np.float64, count),
+            'age': np.fromiter((org.age for org in organisms), np.float64, count),
+            'fitness': np.fromiter((org.fitness for org in organisms), np.float64, count),
+            'generation': np.fromiter((org.generation for org in organisms), np.int64, count),
+            'alive': np.fromiter((org.alive for org in organisms), np.bool_, count),
+            'genes': _gene_matrix(organisms),
+        }
+        return columns, self.next_organism_id
+        
+    def _restore_organisms(self, columns, next_organism_id):
+        """Восстанавливает организмов из колонок сохранения"""
+        self.organisms[:] = organisms_from_columns(columns)
+        self.organisms_by_id.clear()
+        self.organisms_by_id.update(zip(columns['ids'].tolist(), self.organisms))
+        
+        # Сетка агрессивных: отбор и радиус считаются по колонкам сразу для всех
+        index = self.aggressive_index
+        index.reset(item_radius=0.0)
+        aggressive = columns['genes'][AGGRESSION] > AGGRESSION_THRESHOLD
+        for organism in compress(self.organisms, aggressive.tolist()):
+            index.insert(organism, organism.x, organism.y)
+        if aggressive.any():
+            index.item_radius = float(columns['genes'][SIZE][aggressive].max())
+        self.next_organism_id = next_organism_id
+        
+    def _get_rng_state(self):
+        """Зерно и состояние потоков случайных чисел в виде, пригодном для JSON"""
+        streams = {}
+        for name, stream in self.rng.items():
+            if isinstance(stream, random.Random):
+                streams[name] = stream.getstate()
+            else:
+                streams[name] = stream.bit_generator.state
+        return {'seed': self.seed, 'fixed_seed': self.fixed_seed, 'streams': streams}
+        
+    def _set_rng_state(self, state):
+        """Восстанавливает зерно и состояние потоков случайных чисел"""
+        self.fixed_seed = state['fixed_seed']
+        self._seed_streams(state['seed'])
+        for name, stream in self.rng.items():
+            if isinstance(stream, random.Random):
+                version, internal, gauss_next = state['streams'][name]
+                stream.setstate((version, tuple(internal), gauss_next))
+            else:
+                stream.bit_generator.state = state['streams'][name]
+        
+    def set_parameters(self, initial_organisms=None, food_spawn_rate=None, max_food=None):
         """Устанавливает параметры симуляции"""
         if initial_organisms is not None:
             self.initial_organisms = initial_organisms
         if food_spawn_rate is not None:
             self.food_spawn_rate = food_spawn_rate
+        if max_food is not None:
+            self.max_food = max_food
             
     def get_organisms(self):
         """Возвращает список живых организмов"""
         return [org for org in self.organisms if org.alive]
         
+    def get_organism(self, organism_id):
+        """Возвращает живой организм по id за O(1) или None, если его нет"""
+        organism = self.organisms_by_id.get(organism_id)
+        if organism is None or not organism.alive:
+            return None
+        return organism
+        
     def get_food_sources(self):
         """Возвращает список источников пищи"""
         return [food for food in self.food_sources if not food.get('consumed', False)]
         
+    def get_organism_arrays(self):
+        """Возвращает живых организмов в виде словаря массивов NumPy"""
+        import numpy as np
+        from snapshot import organism_arrays
+        
+        organisms = self.get_organisms()
+        count = len(organisms)
+        return organism_arrays(
+            ids=np.fromiter((org.id for org in organisms), np.int64, count),
+            x=np.fromiter((org.x for org in organisms), np.float64, count),
+            y=np.fromiter((org.y for org in organisms), np.float64, count),
+            energy=np.fromiter((org.energy for org in organisms), np.float64, count),
+            age=np.fromiter((org.age for org in organisms), np.float64, count),
+            fitness=np.fromiter((org.fitness for org in organisms), np.float64, count),
+            generation=np.fromiter((org.generation for org in organisms), np.int64, count),
+            genes=np.ascontiguousarray(_gene_matrix(organisms)),
+        )
+        
+    def get_food_arrays(self):
+        """Возвращает несъеденную пищу в виде словаря массивов NumPy"""
+        import numpy as np
+        
+        food_sources = self.get_food_sources()
+        count = len(food_sources)
+        return {
+            'ids': np.fromiter((food['id'] for food in food_sources), np.int64, count),
+            'x': np.fromiter((food['x'] for food in food_sources), np.float64, count),
+            'y': np.fromiter((food['y'] for food in food_sources), np.float64, count),
+            'size': np.fromiter((food['size'] for food in food_sources), np.float64, count),
+        }
+        
+    def get_snapshot(self):
+        """Возвращает последний опубликованный снимок (None, если снимки выключены)"""
+        return self.latest_snapshot
+        
     def get_statistics(self):
         """Возвращает текущую статистику"""
         return self.stats.copy()
@@ -217,21 +604,28 @@ class EvolutionSimulation:
         for gen, orgs in generations.items():
             gen_stats[gen] = {
                 'count': len(orgs),
-                'avg_speed': sum(org.genes['speed'] for org in orgs) / len(orgs),
-                'avg_size': sum(org.genes['size'] for org in orgs) / len(orgs),
-                'avg_energy_efficiency': sum(org.genes['energy_efficiency'] for org in orgs) / len(orgs),
-                'avg_aggression': sum(org.genes['aggression'] for org in orgs) / len(orgs),
+                'avg_speed': sum(org.gene('speed') for org in orgs) / len(orgs),
+                'avg_size': sum(org.gene('size') for org in orgs) / len(orgs),
+                'avg_energy_efficiency': sum(org.gene('energy_efficiency') for org in orgs) / len(orgs),
+                'avg_aggression': sum(org.gene('aggression') for org in orgs) / len(orgs),
             }
             
         return gen_stats
         
     def get_gene_history(self):
-        """Возвращает историю изменений генов"""
-        return self.gene_history.copy()
+        """Возвращает историю изменений генов (последние точки)"""
+        return self.gene_history.as_dict()
+        
+    def get_gene_overview(self):
+        """Возвращает обзор истории генов за весь прогон (min/mean/max по блокам)"""
+        return {key: self.gene_history.overview(key) for key in HISTORY_KEYS}
         
     def get_best_organisms(self, top_n=5):
-        """Возвращает самых приспособленных организмов"""
+        """Возвращает самых приспособленных организмов (по итогам последнего шага).
+
+        Для top_n не больше TOP_K это срез готового списка, иначе - полная сортировка.
+        """
+        if top_n <= TOP_K:
+            return self.top_organisms[:top_n]
         alive_organisms = [org for org in self.organisms if org.alive]
-        if not alive_organisms:
-            return []
-        return sorted(alive_organisms, key=lambda x: x.fitness, reverse=True)[:top_n]
\ No newline at end of file
+        return sorted(alive_organisms, key=attrgetter('fitness'), reverse=True)[:top_n]
\ No newline at end of file
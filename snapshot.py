@@ -0,0 +1,122 @@
+import numpy as np
+from organism import GENE_NAMES, COLOR_GENES
+from ranking import top_rows, FitnessRanking
+from spatial import PointGrid, PICK_CELL_SIZE
+
+SIZE = GENE_NAMES.index('size')
+COLOR_ROWS = [GENE_NAMES.index(name) for name in COLOR_GENES]
+
+def organism_arrays(ids, x, y, energy, age, fitness, generation, genes):
+    """Собирает словарь массивов организмов; genes - массив (9, n)"""
+    return {
+        'ids': np.asarray(ids, dtype=np.int64),
+        'x': np.asarray(x, dtype=np.float64),
+        'y': np.asarray(y, dtype=np.float64),
+        'energy': np.asarray(energy, dtype=np.float64),
+        'age': np.asarray(age, dtype=np.float64),
+        'fitness': np.asarray(fitness, dtype=np.float64),
+        'generation': np.asarray(generation, dtype=np.int64),
+        'genes': genes,
+        'size': genes[SIZE].copy(),
+        'color': genes[COLOR_ROWS].T.astype(np.uint8),
+    }
+
+class Snapshot:
+    """Неизменяемый снимок состояния симуляции после шага.
+
+    Симуляция собирает новый снимок в своем потоке и публикует его одной
+    заменой ссылки (simulation.latest_snapshot), а GUI читает только
+    опубликованный снимок. Массивы снимка доступны только для чтения,
+    поэтому их можно читать из другого потока без блокировок.
+    top_ids - id лучших организмов по убыванию приспособленности, которые
+    симуляция отбирает один раз за шаг (без них лучшие отбираются здесь).
+    Места по приспособленности и сетка для выбора организма строятся при
+    первом обращении, поэтому шаг без запросов их не строит. Если их
+    одновременно запросят два потока, оба построят одинаковую структуру,
+    и останется любая из них.
+    """
+
+    def __init__(self, time_step, stats, organisms, food, top_ids=None, best_count=5):
+        self.time_step = time_step
+        self.stats = dict(stats)
+        self.organisms = organisms
+        self.food = food
+        for arrays in (organisms, food):
+            for array in arrays.values():
+                array.setflags(write=False)
+
+        # Строки лучших организмов по убыванию приспособленности
+        if top_ids is None:
+            self._top = top_rows(organisms['fitness'], best_count)
+        else:
+            self._top = np.searchsorted(organisms['ids'], np.asarray(top_ids, dtype=np.int64))
+        # Лучшие организмы (выделяются на экране)
+        self.best_rows = self._top[:best_count]
+        self._ranking = None
+        self._grid = None
+
+    @property
+    def population(self):
+        return len(self.organisms['ids'])
+
+    @property
+    def ranking(self):
+        """Места по приспособленности (FitnessRanking)"""
+        if self._ranking is None:
+            self._ranking = FitnessRanking(self.organisms['fitness'])
+        return self._ranking
+
+    @property
+    def grid(self):
+        """Сетка позиций организмов для поиска ближайшего (PointGrid)"""
+        if self._grid is None:
+            self._grid = PointGrid(self.organisms['x'], self.organisms['y'], PICK_CELL_SIZE)
+        return self._grid
+
+    @property
+    def best_ids(self):
+        return self.organisms['ids'][self.best_rows]
+
+    def top_rows(self, top_n):
+        """Строки top_n самых приспособленных организмов по убыванию приспособленности"""
+        if top_n <= len(self._top) or len(self._top) == self.population:
+            return self._top[:top_n]
+        return top_rows(self.organisms['fitness'], top_n)
+
+    def row_of(self, organism_id):
+        """Возвращает строку организма по id или None (ids в снимке отсортированы)"""
+        if organism_id is None:
+            return None
+        ids = self.organisms['ids']
+        row = int(np.searchsorted(ids, organism_id))
+        if row < len(ids) and ids[row] == organism_id:
+            return row
+        return None
+
+    def nearest(self, x, y, max_distance):
+        """Возвращает строку ближайшего к точке организма в пределах max_distance"""
+        return self.grid.nearest(x, y, max_distance)
+
+    def rank_of(self, row):
+        """Возвращает место организма по приспособленности (1 - лучший)"""
+        return self.ranking.rank(self.organisms['fitness'][row])
+
+    def organism_info(self, row):
+        """Возвращает информацию об организме в формате Organism.get_info"""
+        arrays = self.organisms
+        genes = dict(zip(GENE_NAMES, arrays['genes'][:, row].tolist()))
+        for name in COLOR_GENES:
+            genes[name] = int(genes[name])
+        energy = float(arrays['energy'][row])
+        age = float(arrays['age'][row])
+        return {
+            'id': int(arrays['ids'][row]),
+            'position': (float(arrays['x'][row]), float(arrays['y'][row])),
+            'energy': energy,
+            'age': age,
+            'generation': int(arrays['generation'][row]),
+            'genes': genes,
+            'alive': True,
+            'fitness': float(arrays['fitness'][row]),
+            'can_reproduce': energy > genes['reproduction_threshold'] and age > 100,
+        }
@@ -0,0 +1,208 @@
+class SpatialHash:
+    """Равномерная сетка (пространственный хеш) для быстрого поиска соседей"""
+
+    def __init__(self, cell_size, item_radius=0.0):
+        # Размер ячейки сетки и максимальный радиус объекта в индексе
+        self.cell_size = cell_size
+        self.item_radius = item_radius
+
+        # Ячейки: (cx, cy) -> {ключ: объект}
+        self.cells = {}
+        # Ключ -> (ячейка, порядковый номер вставки)
+        self._entries = {}
+        self._next_seq = 0
+
+    def _cell(self, x, y):
+        """Возвращает координаты ячейки для точки"""
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def reset(self, cell_size=None, item_radius=None):
+        """Очищает индекс и при необходимости меняет размер ячейки"""
+        if cell_size is not None:
+            self.cell_size = cell_size
+        if item_radius is not None:
+            self.item_radius = item_radius
+        self.cells = {}
+        self._entries = {}
+        self._next_seq = 0
+
+    def insert(self, key, x, y, item=None):
+        """Добавляет объект в индекс (по умолчанию объектом считается сам ключ)"""
+        cell = self._cell(x, y)
+        self.cells.setdefault(cell, {})[key] = key if item is None else item
+        self._entries[key] = (cell, self._next_seq)
+        self._next_seq += 1
+
+    def remove(self, key):
+        """Удаляет объект из индекса"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        bucket = self.cells[entry[0]]
+        del bucket[key]
+        if not bucket:
+            del self.cells[entry[0]]
+
+    def move(self, key, x, y):
+        """Переносит объект в ячейку, соответствующую новой позиции"""
+        cell = self._cell(x, y)
+        old_cell, seq = self._entries[key]
+        if cell == old_cell:
+            return
+        bucket = self.cells[old_cell]
+        item = bucket.pop(key)
+        if not bucket:
+            del self.cells[old_cell]
+        self.cells.setdefault(cell, {})[key] = item
+        # Порядковый номер сохраняется, чтобы порядок обхода не зависел от перемещений
+        self._entries[key] = (cell, seq)
+
+    def query(self, x, y, radius):
+        """Возвращает объекты из ячеек, пересекающих квадрат радиуса radius.
+
+        Результат упорядочен по времени вставки, поэтому совпадает с порядком
+        полного перебора исходного списка.
+        """
+        min_cx, min_cy = self._cell(x - radius, y - radius)
+        max_cx, max_cy = self._cell(x + radius, y + radius)
+
+        found = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    found.extend(bucket.items())
+
+        if len(found) > 1:
+            entries = self._entries
+            found.sort(key=lambda pair: entries[pair[0]][1])
+        return [item for _, item in found]
+
+    def __iter__(self):
+        """Обходит ключи индекса в порядке вставки"""
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+def grid_pairs(ax, ay, bx, by, cell_size):
+    """Векторный поиск пар-кандидатов между точками a и b (массивы NumPy).
+
+    Точки b сортируются по ячейкам, затем для каждой точки a просматриваются
+    девять соседних ячеек. Возвращает массивы индексов (ia, ib) всех пар,
+    в которых b лежит в соседней ячейке; точную проверку расстояния делает
+    вызывающий код. cell_size должен быть не меньше радиуса взаимодействия.
+    """
+    import numpy as np
+
+    empty = np.zeros(0, dtype=np.int64)
+    if len(ax) == 0 or len(bx) == 0:
+        return empty, empty
+
+    acx = np.floor_divide(ax, cell_size).astype(np.int64)
+    acy = np.floor_divide(ay, cell_size).astype(np.int64)
+    bcx = np.floor_divide(bx, cell_size).astype(np.int64)
+    bcy = np.floor_divide(by, cell_size).astype(np.int64)
+
+    # Ключ ячейки; сдвиг на 1 оставляет место для соседей с обеих сторон
+    min_cx = min(acx.min(), bcx.min()) - 1
+    min_cy = min(acy.min(), bcy.min()) - 1
+    stride = max(acy.max(), bcy.max()) - min_cy + 2
+    a_key = (acx - min_cx) * stride + (acy - min_cy)
+    b_key = (bcx - min_cx) * stride + (bcy - min_cy)
+
+    order = np.argsort(b_key, kind='stable')
+    sorted_keys = b_key[order]
+
+    ia_parts = []
+    ib_parts = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            key = a_key + dx * stride + dy
+            start = np.searchsorted(sorted_keys, key, side='left')
+            count = np.searchsorted(sorted_keys, key, side='right') - start
+            total = count.sum()
+            if total == 0:
+                continue
+            ia = np.repeat(np.arange(len(ax)), count)
+            # Позиция внутри группы каждой пары
+            offsets = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+            ia_parts.append(ia)
+            ib_parts.append(order[np.repeat(start, count) + offsets])
+
+    if not ia_parts:
+        return empty, empty
+    return np.concatenate(ia_parts), np.concatenate(ib_parts)
+
+
+# Размер ячейки сетки для выбора организма (радиус выбора кликом в GUI - 20)
+PICK_CELL_SIZE = 20.0
+
+class PointGrid:
+    """Неизменяемая сетка точек (массивы NumPy) для поиска ближайшей точки.
+
+    Точки один раз сортируются по ячейкам; запрос просматривает только ячейки,
+    пересекающие круг поиска, поэтому его время не зависит от общего числа точек.
+    """
+
+    def __init__(self, x, y, cell_size):
+        import numpy as np
+
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.cell_size = cell_size
+        if len(self.x) == 0:
+            return
+
+        cx = np.floor_divide(self.x, cell_size).astype(np.int64)
+        cy = np.floor_divide(self.y, cell_size).astype(np.int64)
+        self._min_cx, self._max_cx = int(cx.min()), int(cx.max())
+        self._min_cy, self._max_cy = int(cy.min()), int(cy.max())
+        # Ключ ячейки: столбец за столбцом, внутри столбца ячейки идут подряд
+        self._stride = self._max_cy - self._min_cy + 1
+        keys = (cx - self._min_cx) * self._stride + (cy - self._min_cy)
+        self._order = np.argsort(keys, kind='stable')
+        self._keys = keys[self._order]
+
+    def __len__(self):
+        return len(self.x)
+
+    def nearest(self, x, y, max_distance):
+        """Индекс ближайшей точки на расстоянии меньше max_distance или None.
+
+        При равных расстояниях возвращается меньший индекс.
+        """
+        import numpy as np
+
+        if len(self.x) == 0:
+            return None
+        # Границы круга поиска обрезаются по занятым ячейкам (и для бесконечного радиуса)
+        cell_size = self.cell_size
+        min_cx = int(max(x - max_distance, self._min_cx * cell_size) // cell_size)
+        max_cx = int(min(x + max_distance, self._max_cx * cell_size) // cell_size)
+        min_cy = int(max(y - max_distance, self._min_cy * cell_size) // cell_size)
+        max_cy = int(min(y + max_distance, self._max_cy * cell_size) // cell_size)
+        if min_cx > max_cx or min_cy > max_cy:
+            return None
+
+        # Ячейки одного столбца занимают непрерывный диапазон ключей
+        parts = []
+        for cx in range(min_cx, max_cx + 1):
+            column = (cx - self._min_cx) * self._stride - self._min_cy
+            start = self._keys.searchsorted(column + min_cy, side='left')
+            end = self._keys.searchsorted(column + max_cy, side='right')
+            if end > start:
+                parts.append(self._order[start:end])
+        if not parts:
+            return None
+
+        rows = np.concatenate(parts)
+        distance = np.hypot(self.x[rows] - x, self.y[rows] - y)
+        best = distance.min()
+        if not best < max_distance:
+            return None
+        return int(rows[distance == best].min())
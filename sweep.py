@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Перебор параметров симуляции в пуле процессов
+"""
+
+import argparse
+import csv
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from simulation import ENGINES
+from headless import run_simulation
+
+# Колонки итоговой таблицы
+TABLE_COLUMNS = (
+    'initial_organisms', 'food_spawn_rate', 'max_food', 'seed',
+    'mean_population', 'population', 'total_births', 'total_deaths',
+    'avg_generation', 'avg_speed', 'avg_size', 'avg_energy_efficiency', 'avg_aggression',
+    'steps_per_second',
+)
+
+def sweep_points(populations, food_rates, max_foods, seed=0):
+    """Все комбинации параметров; каждый прогон получает свое зерно"""
+    points = []
+    for index, (population, food_rate, max_food) in enumerate(
+            itertools.product(populations, food_rates, max_foods)):
+        points.append({
+            'initial_organisms': population,
+            'food_spawn_rate': food_rate,
+            'max_food': max_food,
+            'seed': seed + index,
+        })
+    return points
+
+def run_point(point, steps, engine='python', width=800, height=600):
+    """Выполняет один прогон и возвращает строку таблицы (запускается в процессе пула)"""
+    result = run_simulation(steps, engine=engine, width=width, height=height, **point)
+    stats = result['statistics']
+    row = dict(point)
+    row['mean_population'] = result['mean_population']
+    row['steps_per_second'] = result['steps_per_second']
+    for column in TABLE_COLUMNS:
+        if column not in row:
+            row[column] = stats[column]
+    return row
+
+def run_sweep(points, steps, engine='python', width=800, height=600, workers=None):
+    """Выполняет прогоны в пуле процессов и отдает строки по мере готовности"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_point, point, steps, engine, width, height)
+                   for point in points]
+        for future in as_completed(futures):
+            yield future.result()
+
+def write_table(rows, path):
+    """Записывает таблицу результатов в CSV, упорядочив строки по параметрам"""
+    rows = sorted(rows, key=lambda row: (row['initial_organisms'], row['food_spawn_rate'],
+                                         row['max_food']))
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({column: row[column] for column in TABLE_COLUMNS})
+
+def main(argv=None):
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Эволюция: перебор параметров в пуле процессов")
+    parser.add_argument('--populations', type=int, nargs='+', default=[10, 20, 40],
+                        help="значения начальной популяции")
+    parser.add_argument('--food-rates', type=float, nargs='+', default=[0.2, 0.5, 1.0],
+                        help="значения частоты появления пищи")
+    parser.add_argument('--max-food', type=int, nargs='+', default=[40, 80, 160],
+                        help="значения максимума пищи")
+    parser.add_argument('--engine', choices=ENGINES, default='python',
+                        help="движок симуляции (python - объекты, numpy - массивы)")
+    parser.add_argument('--width', type=int, default=800, help="ширина мира")
+    parser.add_argument('--height', type=int, default=600, help="высота мира")
+    parser.add_argument('--steps', type=int, default=2000, help="число шагов в каждом прогоне")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="зерно первого прогона (следующие получают seed+1, seed+2, ...)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--output', default='sweep.csv', help="файл итоговой таблицы (CSV)")
+    args = parser.parse_args(argv)
+
+    points = sweep_points(args.populations, args.food_rates, args.max_food, args.seed)
+    rows = []
+    for row in run_sweep(points, args.steps, engine=args.engine, width=args.width,
+                         height=args.height, workers=args.workers):
+        rows.append(row)
+        print(f"[{len(rows)}/{len(points)}] популяция={row['initial_organisms']} "
+              f"пища={row['food_spawn_rate']}/{row['max_food']} -> "
+              f"средняя популяция {row['mean_population']:.1f}", flush=True)
+
+    write_table(rows, args.output)
+    print(f"Таблица записана в {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,13 @@
 Тестовый скрипт для проверки работы симуляции без GUI
 """
 
-from simulation import EvolutionSimulation
-from organism import Organism
+from simulation import EvolutionSimulation, create_simulation
+from organism import Organism, GENE_NAMES, mutate_genes
+from scheduler import StepScheduler
+import sys
 import time
+import types
+import random
 
 def test_basic_simulation():
     """Тест базовой функциональности симуляции"""
@@ -96,11 +100,798 @@ def test_evolution_trends():
     for data in generations_data:
         print(f"{data['step']}\t{data['population']}\t{data['avg_speed']:.2f}\t{data['avg_efficiency']:.2f}\t{data['avg_generation']:.1f}")
 
+def test_spatial_index_matches_full_scan():
+    """Тест: сетка соседей даёт тот же результат, что и полный перебор"""
+    print("\n=== Тест пространственного индекса ===")
+    
+    results = []
+    for use_index in (False, True):
+        sim = EvolutionSimulation(width=300, height=200, seed=42)
+        sim.set_parameters(initial_organisms=60)
+        sim.reset()
+        sim.use_spatial_index = use_index
+        for _ in range(150):
+            sim.update(dt=1.0)
+        results.append([(org.x, org.y, org.energy) for org in sim.organisms])
+        # Сетка пищи очищается от съеденной пищи и без пространственного индекса
+        assert len(sim.food_index) == len(sim.food_sources)
+        # В сетке агрессивных - ровно живые агрессивные организмы в порядке id
+        assert list(sim.aggressive_index) == [org for org in sim.organisms
+                                              if org.genes['aggression'] > 0.7]
+        
+    print(f"Популяция: {len(results[0])} / {len(results[1])}")
+    assert results[0] == results[1]
+
+def test_numpy_engine():
+    """Тест движка на массивах NumPy"""
+    print("\n=== Тест движка NumPy ===")
+    
+    sim = create_simulation(width=400, height=300, engine='numpy')
+    for _ in range(300):
+        sim.update(dt=1.0)
+        
+    stats = sim.get_statistics()
+    organisms = sim.get_organisms()
+    print(f"Популяция: {stats['population']}, рождений: {stats['total_births']}, "
+          f"смертей: {stats['total_deaths']}")
+    assert stats['population'] == len(organisms)
+    
+    best = sim.get_best_organisms(top_n=3)
+    assert best[0].fitness == max(org.fitness for org in organisms)
+    assert best[0] in organisms
+    info = best[0].get_info()
+    assert 0 <= info['position'][0] <= 400 and 0 <= info['position'][1] <= 300
+    assert all(0 <= c <= 255 for c in best[0].get_color())
+
+def test_vectorized_mutation():
+    """Тест: матричная мутация следует тем же правилам, что и mutate_genes"""
+    print("\n=== Тест пакетной мутации ===")
+    import numpy as np
+    from numpy_simulation import mutate_gene_matrix
+    
+    class FixedNoise:
+        """Генератор, возвращающий заранее заданный шум"""
+        def __init__(self, noise):
+            self.noise = noise
+        def standard_normal(self, shape):
+            return self.noise
+    
+    parents = [Organism(100, 100).genes for _ in range(200)]
+    matrix = np.array([[genes[name] for genes in parents] for name in GENE_NAMES], dtype=float)
+    noise = np.random.default_rng(1).standard_normal(matrix.shape) * 3
+    children = mutate_gene_matrix(matrix, FixedNoise(noise))
+    
+    original_gauss = random.gauss
+    try:
+        for k, genes in enumerate(parents):
+            column = iter(noise[:, k])
+            random.gauss = lambda mu, sigma: mu + next(column) * sigma
+            expected = mutate_genes(genes)
+            for row, name in enumerate(GENE_NAMES):
+                assert abs(expected[name] - children[row, k]) < 1e-9, name
+    finally:
+        random.gauss = original_gauss
+    print(f"Проверено потомков: {len(parents)}")
+
+def test_gene_history_ring_buffer():
+    """Тест ограниченной истории генов и обзора всего прогона"""
+    print("\n=== Тест истории генов ===")
+    from history import GeneHistory, HISTORY_KEYS
+    
+    history = GeneHistory(capacity=50, overview_size=8)
+    for i in range(1000):
+        history.append({key: float(i) for key in HISTORY_KEYS})
+        
+    recent = history.series('speed')
+    overview = history.overview('speed')
+    print(f"Точек в буфере: {len(recent)}, блоков обзора: {len(overview['mean'])}, "
+          f"длина блока: {history.block_size}")
+    assert recent == [float(i) for i in range(950, 1000)]
+    assert len(overview['mean']) <= 8
+    # Обзор покрывает весь прогон
+    assert overview['min'][0] == 0.0 and overview['max'][-1] == 999.0
+
+def test_snapshots():
+    """Тест снимков состояния, которые читает GUI"""
+    print("\n=== Тест снимков ===")
+    
+    for engine in ('python', 'numpy'):
+        sim = create_simulation(width=400, height=300, engine=engine, snapshots=True)
+        first = sim.get_snapshot()
+        for _ in range(100):
+            sim.update(dt=1.0)
+        snapshot = sim.get_snapshot()
+        
+        print(f"{engine}: шаг {snapshot.time_step}, популяция {snapshot.population}")
+        assert first is not snapshot and first.time_step == 0
+        assert snapshot.population == snapshot.stats['population'] == len(sim.get_organisms())
+        assert not snapshot.organisms['x'].flags.writeable
+        # Лучший организм снимка находится по id и имеет первое место
+        best_id = int(snapshot.best_ids[0])
+        assert snapshot.rank_of(snapshot.row_of(best_id)) == 1
+
+def test_step_scheduler():
+    """Тест планировщика шагов с фиксированным dt"""
+    print("\n=== Тест планировщика шагов ===")
+    
+    # Искусственные часы: шаг занимает step_cost секунд
+    clock = [0.0]
+    steps = []
+    def step(dt):
+        steps.append(dt)
+        clock[0] += step_cost
+    def sleep(delay):
+        assert not scheduler.behind, "Планировщик не должен спать при отставании"
+        clock[0] += delay
+    
+    # Быстрые шаги: выполняется ровно base_rate * speed шагов в секунду
+    step_cost = 0.001
+    scheduler = StepScheduler(step, step_dt=1.0, clock=lambda: clock[0], sleep=sleep)
+    scheduler.speed = 5.0
+    scheduler.run(lambda: clock[0] < 10.0)
+    print(f"Быстрые шаги: {len(steps)} шагов за 10 с, отставание: {scheduler.behind}")
+    assert abs(len(steps) - 1000) <= 2
+    assert set(steps) == {1.0} and scheduler.dropped_steps == 0
+    
+    # Медленные шаги: отставание отмечается, лишний долг отбрасывается
+    step_cost = 0.05
+    steps.clear()
+    scheduler.run(lambda: clock[0] < 20.0)
+    print(f"Медленные шаги: {len(steps)} шагов, пропущено {scheduler.dropped_steps}, "
+          f"{scheduler.measured_rate:.1f} шагов/с")
+    assert scheduler.behind and scheduler.dropped_steps > 0
+    assert abs(scheduler.measured_rate - 20.0) < 1.0
+
+def test_running_stats_match_rescan():
+    """Тест: накопительные суммы совпадают с полным пересчетом по популяции"""
+    print("\n=== Тест накопительной статистики ===")
+    from running_stats import RunningStats, STAT_GENES
+    
+    for engine in ('python', 'numpy'):
+        sim = create_simulation(width=400, height=300, engine=engine)
+        for _ in range(300):
+            sim.update(dt=1.0)
+        organisms = sim.get_organisms()
+        count = len(organisms)
+        averages = sim.running_stats.averages()
+        
+        print(f"{engine}: популяция {count}")
+        assert sim.running_stats.count == count
+        for gene_name in STAT_GENES:
+            expected = sum(org.genes[gene_name] for org in organisms) / count
+            assert abs(averages[f'avg_{gene_name}'] - expected) < 1e-9, gene_name
+        assert abs(averages['avg_generation'] - sum(org.generation for org in organisms) / count) < 1e-9
+        assert abs(averages['avg_fitness'] - sum(org.fitness for org in organisms) / count) < 1e-9
+        
+    # После вымирания суммы обнуляются точно, без остаточной погрешности
+    stats = RunningStats()
+    organisms = [Organism() for _ in range(50)]
+    for organism in organisms:
+        organism.generation = 3
+        stats.add_organism(organism)
+    for organism in organisms:
+        stats.remove_organism(organism)
+    assert stats.count == 0 and stats.fitness_sum == 0.0
+    assert all(value == 0.0 for value in stats.gene_sums.values())
+    assert stats.max_generation == 3
+
+def test_raster_renderer():
+    """Тест растровой отрисовки: штампы кругов, обрезка по краям и полоски энергии"""
+    print("\n=== Тест растровой отрисовки ===")
+    import numpy as np
+    from snapshot import Snapshot, organism_arrays
+    if 'tkinter' not in sys.modules:
+        try:
+            import tkinter
+        except ImportError:
+            # Без Tk проверяется только буфер пикселей
+            sys.modules['tkinter'] = types.ModuleType('tkinter')
+    import renderer
+    from renderer import RasterRenderer, pack_rgb
+    
+    class FakePhotoImage:
+        """Заменяет tk.PhotoImage: запоминает переданные данные"""
+        def __init__(self, width, height, data, format):
+            self.width, self.height, self.data = width, height, data
+    
+    class FakeCanvas:
+        def __init__(self):
+            self.images = []
+        def create_image(self, x, y, image, anchor):
+            self.images.append(image)
+            return 1
+        def itemconfig(self, item, image):
+            self.images.append(image)
+    
+    # Один организм радиуса 3 с энергией 50 и пища в углу мира
+    genes = np.zeros((len(GENE_NAMES), 1))
+    genes[GENE_NAMES.index('size')] = 3
+    genes[GENE_NAMES.index('color_r')] = 255
+    organisms = organism_arrays(ids=[7], x=[10.0], y=[30.0], energy=[50.0], age=[0.0],
+                                fitness=[1.0], generation=[0], genes=genes)
+    food = {'ids': np.array([0]), 'x': np.array([0.0]), 'y': np.array([0.0]),
+            'size': np.array([2.0])}
+    snapshot = Snapshot(1, {}, organisms, food)
+    
+    canvas = FakeCanvas()
+    raster = RasterRenderer(canvas, 40, 40)
+    original_tk = renderer.tk
+    renderer.tk = types.SimpleNamespace(PhotoImage=FakePhotoImage)
+    try:
+        raster.render(snapshot)
+        raster.render(snapshot, selected_id=7)
+    finally:
+        renderer.tk = original_tk
+    pixels = raster.pixels.reshape(40, 40)
+    
+    # Круг организма и обводка лучшего организма (радиус 3 + 2)
+    assert pixels[30, 10] == pixels[30, 13] == pack_rgb(255, 0, 0)
+    # Выбранный организм обведен кругом радиуса 3 + 3
+    assert pixels[30, 15] == pixels[30, 16] == RasterRenderer.SELECTED_COLOR
+    assert pixels[30, 17] == RasterRenderer.BACKGROUND
+    # Пища в углу обрезана по краю и не заворачивается на другую сторону буфера
+    assert pixels[0, 0] == pixels[0, 2] == RasterRenderer.FOOD_COLOR
+    assert pixels[0, 39] == pixels[39, 39] == RasterRenderer.BACKGROUND
+    # Полоска энергии: строки 19-21, заполнена на половину ширины 6
+    assert list(pixels[20, 7:13]) == [RasterRenderer.BAR_COLOR] * 3 + [RasterRenderer.BAR_BACKGROUND] * 3
+    assert pixels[22, 7] != RasterRenderer.BAR_COLOR
+    # Кадр передан одним PPM-изображением
+    assert len(canvas.images) == 2
+    assert len(canvas.images[-1].data) == len(b"P6 40 40 255 ") + 40 * 40 * 3
+    print("Буфер пикселей проверен")
+
+def test_substeps():
+    """Тест: большой dt делится на подшаги и не пропускает контакты"""
+    print("\n=== Тест подшагов ===")
+    
+    results = []
+    for dt, steps in ((8.0, 10), (1.0, 80)):
+        sim = EvolutionSimulation(width=400, height=300, seed=7)
+        for _ in range(steps):
+            sim.update(dt=dt)
+        results.append((sim.time_step, [(org.x, org.y, org.energy) for org in sim.organisms]))
+        
+    print(f"Шагов: {results[0][0]}, популяция: {len(results[0][1])}")
+    # update(8) - ровно восемь шагов с dt=1
+    assert results[0] == results[1]
+    
+    # Без ограничения подшагов dt применяется целиком
+    sim = EvolutionSimulation(width=400, height=300, max_substep_dt=None)
+    sim.update(dt=8.0)
+    assert sim.time_step == 1
+
+def test_headless_runner():
+    """Тест запуска без графического интерфейса"""
+    print("\n=== Тест запуска без интерфейса ===")
+    import json
+    import os
+    import subprocess
+    import tempfile
+    from headless import run_simulation
+    
+    for engine in ('python', 'numpy'):
+        first = run_simulation(60, engine=engine, initial_organisms=30, seed=3)
+        second = run_simulation(60, engine=engine, initial_organisms=30, seed=3)
+        print(f"{engine}: {first['steps_per_second']:.0f} шагов/с, "
+              f"популяция {first['statistics']['population']}")
+        # Одинаковое зерно - одинаковый прогон
+        assert first['statistics'] == second['statistics']
+        
+    # Командная строка работает без tkinter и пишет результаты в файл
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, 'results.json')
+        script = ("import sys, headless; headless.main(sys.argv[1:]); "
+                  "assert 'tkinter' not in sys.modules")
+        subprocess.run([sys.executable, '-c', script, '--steps', '30', '--seed', '1',
+                        '--output', output], check=True, capture_output=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        with open(output, encoding='utf-8') as f:
+            result = json.load(f)
+    assert result['steps'] == 30 and result['config']['seed'] == 1
+    assert set(result['gene_history']) >= {'speed', 'fitness'}
+
+def test_parameter_sweep():
+    """Тест перебора параметров в пуле процессов"""
+    print("\n=== Тест перебора параметров ===")
+    from sweep import sweep_points, run_sweep, run_point
+    
+    points = sweep_points([10, 20], [0.5], [40, 80], seed=100)
+    assert len(points) == 4
+    assert sorted(point['seed'] for point in points) == [100, 101, 102, 103]
+    
+    rows = list(run_sweep(points, steps=40, workers=2))
+    print(f"Прогонов: {len(rows)}")
+    assert len(rows) == len(points)
+    # Результат прогона в пуле совпадает с прогоном в текущем процессе
+    row = next(row for row in rows if row['seed'] == 101)
+    local = run_point(points[1], steps=40)
+    del row['steps_per_second'], local['steps_per_second']
+    assert row == local
+
+def test_benchmark_suite():
+    """Тест набора замеров производительности"""
+    print("\n=== Тест замеров производительности ===")
+    import json
+    from benchmark import run_benchmarks
+    
+    report = run_benchmarks(engines=('python', 'numpy'), populations=(20, 200), food=(80,),
+                            steps=3, seed=1)
+    for result in report['results']:
+        print(f"{result['engine']}: популяция {result['population']}, "
+              f"{result['steps_per_second']:.0f} шагов/с")
+        assert result['steps'] == 3
+        assert result['organism_updates_per_second'] > 0
+        assert result['peak_memory_bytes'] > 0
+    assert len(report['results']) == 4
+    assert report['environment']['python']
+    # Результаты сохраняются в JSON
+    json.dumps(report)
+
+def test_phase_timers():
+    """Тест замеров фаз шага"""
+    print("\n=== Тест замеров фаз шага ===")
+    from profiling import PhaseTimers
+    
+    # Скользящее окно: учитываются только последние window замеров
+    timers = PhaseTimers(window=100)
+    for ms in range(1, 201):
+        timers.add('phase', ms / 1000)
+    summary = timers.summary()['phase']
+    print(f"p50={summary['p50']:.0f} p95={summary['p95']:.0f} max={summary['max']:.0f} мс")
+    assert summary['count'] == 200
+    assert abs(summary['p50'] - 150) <= 1 and abs(summary['p95'] - 195) <= 1
+    assert abs(summary['max'] - 200) < 1e-9
+    
+    for engine in ('python', 'numpy'):
+        sim = create_simulation(width=400, height=300, engine=engine)
+        sim.update(dt=1.0)
+        assert sim.get_phase_timings() == {}
+        sim.enable_profiling()
+        for _ in range(20):
+            sim.update(dt=1.0)
+        timings = sim.get_phase_timings()
+        assert set(timings) == {'step', 'spawn_food', 'organisms', 'interactions',
+                                'reproduction', 'remove_dead', 'statistics', 'ranking'}
+        assert all(timing['count'] == 20 for timing in timings.values())
+        assert timings['step']['p50'] >= timings['organisms']['p50']
+
+def test_checkpoint():
+    """Тест сохранения и загрузки состояния"""
+    print("\n=== Тест сохранения и загрузки ===")
+    import os
+    import tempfile
+    import numpy as np
+    from checkpoint import load_checkpoint
+    
+    for engine in ('python', 'numpy'):
+        sim = create_simulation(width=400, height=300, engine=engine, seed=3)
+        for _ in range(150):
+            sim.update(dt=1.0)
+        
+        fd, path = tempfile.mkstemp(suffix='.evo')
+        os.close(fd)
+        try:
+            sim.save_checkpoint(path)
+            saved_step = sim.time_step
+            for _ in range(80):
+                sim.update(dt=1.0)
+            # Загрузка восстанавливает и состояние потоков случайных чисел
+            restored = load_checkpoint(path)
+            # Перезапись файла, массивы которого отображены в память
+            restored.save_checkpoint(path)
+            assert load_checkpoint(path).time_step == saved_step
+
+            # Сохранение другого движка отклоняется до любых изменений
+            other = create_simulation(width=200, height=100, seed=4,
+                                      engine='numpy' if engine == 'python' else 'python')
+            before = other.get_organism_arrays()
+            try:
+                other.load_checkpoint(path)
+            except ValueError as e:
+                print(f"{other.engine}: {e}")
+            else:
+                assert False, "сохранение другого движка загрузилось"
+            assert (other.width, other.time_step) == (200, 0)
+            after = other.get_organism_arrays()
+            assert all(np.array_equal(before[name], after[name]) for name in before)
+        finally:
+            os.remove(path)
+        assert restored.engine == engine
+        assert restored.time_step == saved_step
+        
+        # Продолжение после загрузки совпадает с непрерывным прогоном
+        for _ in range(80):
+            restored.update(dt=1.0)
+        print(f"{engine}: популяция {sim.stats['population']} / {restored.stats['population']}")
+        assert restored.stats == sim.stats
+        assert restored.get_gene_history() == sim.get_gene_history()
+        assert len(restored.food_index) == len(restored.food_sources) == len(sim.food_sources)
+        expected, actual = sim.get_organism_arrays(), restored.get_organism_arrays()
+        assert all(np.array_equal(expected[name], actual[name]) for name in expected)
+
+def test_seeded_streams():
+    """Тест воспроизводимости прогона по зерну"""
+    print("\n=== Тест зерна и потоков случайных чисел ===")
+    
+    def trajectory(sim, steps):
+        rows = []
+        for _ in range(steps):
+            # Модуль random симуляцией не используется
+            random.random()
+            sim.update(dt=1.0)
+            arrays = sim.get_organism_arrays()
+            rows.append((arrays['x'].tolist(), arrays['energy'].tolist()))
+        return rows
+    
+    for engine in ('python', 'numpy'):
+        first = create_simulation(width=400, height=300, engine=engine, seed=11)
+        second = create_simulation(width=400, height=300, engine=engine, seed=11)
+        other = create_simulation(width=400, height=300, engine=engine, seed=12)
+        expected = trajectory(first, 150)
+        print(f"{engine}: популяция {first.stats['population']}, зерно {first.seed}")
+        assert trajectory(second, 150) == expected
+        assert trajectory(other, 150) != expected
+        
+        # Сброс начинает тот же прогон заново
+        first.reset()
+        assert trajectory(first, 150) == expected
+        
+        # Потоки независимы: пища не влияет на начальную популяцию и движение
+        positions = []
+        for food_spawn_rate in (0.0, 1.0):
+            sim = create_simulation(width=400, height=300, engine=engine, seed=5)
+            sim.set_parameters(food_spawn_rate=food_spawn_rate)
+            sim.reset()
+            for _ in range(20):
+                sim.update(dt=1.0)
+            positions.append(sim.get_organism_arrays()['x'].tolist())
+        assert positions[0] == positions[1]
+    
+    # Без зерна оно выбирается само и позволяет повторить прогон
+    sim = EvolutionSimulation(width=400, height=300)
+    expected = trajectory(sim, 50)
+    assert trajectory(EvolutionSimulation(width=400, height=300, seed=sim.seed), 50) == expected
+
+def test_pairwise_interactions():
+    """Тест: каждая пара взаимодействует один раз за шаг, одинаково в обоих движках"""
+    print("\n=== Тест взаимодействий пар ===")
+    import numpy as np
+    
+    # Два агрессивных организма касаются друг друга: один бой за шаг
+    sim = EvolutionSimulation(width=400, height=300, seed=1)
+    genes = {name: 1.0 for name in GENE_NAMES}
+    genes.update(aggression=0.9, size=5.0, speed=2.0)
+    strong = Organism(100, 100, dict(genes, size=6.0))
+    weak = Organism(104, 100, genes)
+    strong.id, weak.id = 0, 1
+    sim.organisms = [strong, weak]
+    sim.aggressive_index.reset()
+    for organism in sim.organisms:
+        sim._index_organism(organism)
+    for use_index in (False, True):
+        strong.energy = weak.energy = 100
+        sim.use_spatial_index = use_index
+        sim._resolve_interactions()
+        assert (strong.energy, weak.energy) == (130, 50)
+    
+    # Плотная агрессивная популяция: оба движка дают одинаковую энергию
+    rng = np.random.default_rng(2)
+    n = 300
+    columns = {
+        'ids': np.arange(n),
+        'x': rng.uniform(0, 100, n),
+        'y': rng.uniform(0, 100, n),
+        'direction': np.zeros(n),
+        'energy': rng.uniform(20, 100, n),
+        'age': np.zeros(n),
+        'fitness': np.zeros(n),
+        'generation': np.zeros(n, dtype=np.int64),
+        'alive': np.ones(n, dtype=bool),
+        'genes': np.array([rng.uniform(0.75, 1.0, n) if name == 'aggression'
+                           else rng.uniform(2, 8, n) for name in GENE_NAMES]),
+    }
+    initial = columns['energy'].tolist()
+    energies = []
+    for engine in ('python', 'numpy'):
+        sim = create_simulation(width=100, height=100, engine=engine, seed=1)
+        # Движок NumPy использует колонки без копирования
+        sim._restore_organisms({name: column.copy() for name, column in columns.items()}, n)
+        sim._resolve_interactions()
+        energies.append(sim._organism_columns()[0]['energy'].tolist())
+    changed = sum(a != b for a, b in zip(energies[0], initial))
+    print(f"Изменилась энергия у {changed} из {n}")
+    assert changed > 0
+    assert energies[0] == energies[1]
+
+def test_compact_organism():
+    """Тест компактного представления организма"""
+    print("\n=== Тест компактного организма ===")
+    
+    organism = Organism(10, 20)
+    # Атрибуты в __slots__, гены - в массиве без словаря на каждый организм
+    assert not hasattr(organism, '__dict__')
+    assert len(organism.gene_values) == len(GENE_NAMES)
+    
+    genes = organism.genes
+    assert list(genes) == list(GENE_NAMES)
+    assert all(isinstance(genes[name], int) for name in ('color_r', 'color_g', 'color_b'))
+    assert organism.get_color() == (genes['color_r'], genes['color_g'], genes['color_b'])
+    assert organism.get_info()['genes'] == genes
+    assert organism.gene('size') == genes['size']
+    
+    # Свойство возвращает копию, изменение генов - присваиванием
+    genes['size'] = 12.5
+    assert organism.gene('size') != 12.5
+    organism.genes = genes
+    assert organism.gene('size') == 12.5
+
+def test_top_k():
+    """Тест списка лучших организмов, обновляемого раз за шаг"""
+    print("\n=== Тест лучших организмов ===")
+    import numpy as np
+    from ranking import top_rows, TOP_K
+    
+    # Отбор совпадает с устойчивой сортировкой, в том числе при равенствах
+    fitness = np.random.default_rng(3).integers(0, 20, 500).astype(np.float64)
+    for k in (1, 5, 10, 499, 500, 600):
+        expected = np.argsort(-fitness, kind='stable')[:k]
+        assert top_rows(fitness, k).tolist() == expected.tolist()
+    
+    for engine in ('python', 'numpy'):
+        sim = create_simulation(width=400, height=300, engine=engine, seed=4, snapshots=True)
+        sim.set_parameters(initial_organisms=60)
+        sim.reset()
+        for _ in range(120):
+            sim.update(dt=1.0)
+        organisms = sim.get_organisms()
+        ranked = sorted(organisms, key=lambda org: org.fitness, reverse=True)
+        best = sim.get_best_organisms(top_n=TOP_K)
+        print(f"{engine}: лучший {best[0].id}, приспособленность {best[0].fitness:.1f}")
+        assert [org.id for org in best] == [org.id for org in ranked[:TOP_K]]
+        # Больше TOP_K - полная сортировка
+        assert [org.id for org in sim.get_best_organisms(top_n=25)] == \
+            [org.id for org in ranked[:25]]
+        
+        snapshot = sim.get_snapshot()
+        ids = snapshot.organisms['ids']
+        assert ids[snapshot.top_rows(TOP_K)].tolist() == [org.id for org in best]
+        assert ids[snapshot.top_rows(25)].tolist() == [org.id for org in ranked[:25]]
+        fitness = snapshot.organisms['fitness']
+        for row in snapshot.top_rows(TOP_K).tolist():
+            assert snapshot.rank_of(row) == np.count_nonzero(fitness > fitness[row]) + 1
+
+def test_fitness_rank():
+    """Тест места по приспособленности за O(log n)"""
+    print("\n=== Тест места по приспособленности ===")
+    import numpy as np
+    from ranking import FitnessRanking
+    
+    # Равные значения делят место
+    ranking = FitnessRanking([5.0, 3.0, 5.0, 1.0, 9.0])
+    assert [ranking.rank(value) for value in (9.0, 5.0, 3.0, 1.0)] == [1, 2, 4, 5]
+    
+    for engine in ('python', 'numpy'):
+        sim = create_simulation(width=400, height=300, engine=engine, seed=6, snapshots=True)
+        sim.set_parameters(initial_organisms=80)
+        sim.reset()
+        for _ in range(130):
+            sim.update(dt=1.0)
+        # Места и сетка строятся только по запросу, один раз на снимок
+        snapshot = sim.get_snapshot()
+        assert snapshot._ranking is None and snapshot._grid is None
+        organisms = sim.get_organisms()
+        fitness = [org.fitness for org in organisms]
+        for organism in organisms:
+            expected = sum(value > organism.fitness for value in fitness) + 1
+            assert sim.get_rank(organism) == expected
+        assert sim.get_rank(sim.get_best_organisms(1)[0]) == 1
+        assert snapshot._ranking is not None and snapshot._grid is None
+        
+        values = snapshot.organisms['fitness']
+        for row in range(snapshot.population):
+            assert snapshot.rank_of(row) == np.count_nonzero(values > values[row]) + 1
+        print(f"{engine}: места проверены для {len(organisms)} организмов")
+        
+        # После шага места пересчитываются
+        sim.update(dt=1.0)
+        organism = sim.get_organisms()[0]
+        assert sim.get_rank(organism) == sum(
+            org.fitness > organism.fitness for org in sim.get_organisms()) + 1
+        
+        # Без публикации снимков запросы собирают снимок сами
+        plain = create_simulation(width=400, height=300, engine=engine, seed=6)
+        plain.set_parameters(initial_organisms=80)
+        plain.reset()
+        for _ in range(131):
+            plain.update(dt=1.0)
+        assert plain.get_snapshot() is None
+        assert [plain.get_rank(org) for org in plain.get_organisms()] == \
+            [sim.get_rank(org) for org in sim.get_organisms()]
+
+def test_nearest_organism():
+    """Тест поиска ближайшего организма по сетке"""
+    print("\n=== Тест поиска ближайшего организма ===")
+    import numpy as np
+    from spatial import PointGrid
+    
+    # Совпадает с полным перебором, включая равные расстояния и пустые места
+    rng = np.random.default_rng(8)
+    x = rng.integers(0, 300, 2000).astype(np.float64)
+    y = rng.integers(0, 200, 2000).astype(np.float64)
+    for cell_size in (5.0, 20.0, 64.0):
+        grid = PointGrid(x, y, cell_size)
+        for qx, qy, radius in rng.uniform(-30, 330, (300, 3)):
+            radius = abs(radius) / 10
+            distance = np.hypot(x - qx, y - qy)
+            expected = int(np.argmin(distance)) if distance.min() < radius else None
+            assert grid.nearest(qx, qy, radius) == expected
+    assert PointGrid([], [], 20.0).nearest(1, 1, 20) is None
+    assert PointGrid([5.0], [5.0], 20.0).nearest(0, 0, float('inf')) == 0
+    
+    for engine in ('python', 'numpy'):
+        sim = create_simulation(width=400, height=300, engine=engine, seed=9, snapshots=True)
+        sim.set_parameters(initial_organisms=150)
+        sim.reset()
+        for _ in range(50):
+            sim.update(dt=1.0)
+        organisms = sim.get_organisms()
+        snapshot = sim.get_snapshot()
+        for qx, qy in rng.uniform(0, 400, (100, 2)):
+            nearest = min(organisms, key=lambda org: (org.x - qx) ** 2 + (org.y - qy) ** 2)
+            found = sim.find_nearest_organism(qx, qy, max_distance=20)
+            within = np.hypot(nearest.x - qx, nearest.y - qy) < 20
+            assert (found.id if found else None) == (nearest.id if within else None)
+            row = snapshot.nearest(qx, qy, max_distance=20)
+            assert (None if row is None else int(snapshot.organisms['ids'][row])) == \
+                (found.id if found else None)
+        print(f"{engine}: проверено 100 запросов")
+
+def test_organism_lookup():
+    """Тест поиска организма по id"""
+    print("\n=== Тест поиска организма по id ===")
+    for engine in ('python', 'numpy'):
+        sim = create_simulation(width=400, height=300, engine=engine, seed=10)
+        sim.set_parameters(initial_organisms=100)
+        sim.reset()
+        for _ in range(150):
+            sim.update(dt=1.0)
+        alive = {org.id: org for org in sim.get_organisms()}
+        # Выдан каждый id до next_organism_id, часть организмов уже умерла
+        assert sim.next_organism_id == 100 + sim.stats['total_births']
+        assert sim.stats['total_deaths'] > 0 and max(alive) < sim.next_organism_id
+        for organism_id in range(sim.next_organism_id + 5):
+            found = sim.get_organism(organism_id)
+            if organism_id in alive:
+                assert found is not None and found.id == organism_id
+                assert found.energy == alive[organism_id].energy
+            else:
+                assert found is None
+        print(f"{engine}: живых {len(alive)} из {sim.next_organism_id} рожденных")
+
+def test_in_place_compaction():
+    """Тест удаления мертвых организмов и съеденной пищи на месте"""
+    print("\n=== Тест удаления на месте ===")
+    sim = create_simulation(width=400, height=300, seed=11)
+    sim.set_parameters(initial_organisms=100)
+    sim.reset()
+    organisms, food_sources = sim.organisms, sim.food_sources
+    for _ in range(300):
+        sim.update(dt=1.0)
+        # Списки не пересоздаются, порядок по id сохраняется
+        assert sim.organisms is organisms and sim.food_sources is food_sources
+        ids = [org.id for org in organisms]
+        assert ids == sorted(ids) and all(org.alive for org in organisms)
+        assert sorted(sim.organisms_by_id) == ids
+        assert sorted(food['id'] for food in food_sources) == \
+            sorted(sim.food_index)
+    deaths = sim.stats['total_deaths']
+    assert deaths > 0
+    assert sim.stats['total_births'] + 100 - deaths == len(organisms)
+    print(f"умерло {deaths}, живых {len(organisms)}")
+    
+    # Без пищи популяция вымирает и создается заново в тех же списках
+    sim.set_parameters(initial_organisms=30, food_spawn_rate=0)
+    sim.reset()
+    assert sim.organisms is organisms and sim.food_sources is food_sources
+    by_id = sim.organisms_by_id
+    for step in range(3000):
+        first_new_id = sim.next_organism_id
+        sim.update(dt=1.0)
+        assert sim.organisms is organisms and sim.organisms_by_id is by_id
+        if organisms and min(org.id for org in organisms) >= first_new_id:
+            break
+    else:
+        assert False, "популяция не вымерла"
+    assert len(organisms) == 30 and sorted(by_id) == [org.id for org in organisms]
+    print(f"вымирание на шаге {sim.time_step}, популяция создана заново")
+
+def test_feeding_rule():
+    """Тест одинакового правила питания в обоих движках"""
+    print("\n=== Тест правила питания ===")
+    import numpy as np
+    
+    def feed(engine, columns, food):
+        """Один поиск пищи всей популяцией без движения"""
+        n = len(columns['ids'])
+        sim = create_simulation(width=100, height=100, engine=engine, seed=1)
+        sim._restore_organisms({name: column.copy() for name, column in columns.items()}, n)
+        sim.food_sources = [dict(item) for item in food]
+        sim.food_index.reset(item_radius=5)
+        for item in sim.food_sources:
+            sim.food_index.insert(item['id'], item['x'], item['y'], item)
+        if engine == 'python':
+            for organism in sim.organisms:
+                organism._seek_food(sim.food_sources, sim.food_index)
+        else:
+            sim._consume_food()
+        return (sim._organism_columns()[0]['energy'].tolist(),
+                [item['consumed'] for item in sim.food_sources])
+    
+    def population(rng, n, extent):
+        return {
+            'ids': np.arange(n),
+            'x': rng.uniform(0, extent, n),
+            'y': rng.uniform(0, extent, n),
+            'direction': np.zeros(n),
+            'energy': rng.uniform(20, 100, n),
+            'age': np.zeros(n),
+            'fitness': np.zeros(n),
+            'generation': np.zeros(n, dtype=np.int64),
+            'alive': np.ones(n, dtype=bool),
+            'genes': np.array([rng.uniform(0.3, 1.0, n) if name == 'energy_efficiency'
+                               else rng.uniform(2, 8, n) for name in GENE_NAMES]),
+        }
+    
+    # Два организма на одной пище: пищу съедают оба
+    rng = np.random.default_rng(3)
+    pair = population(rng, 2, 1)
+    pair['energy'][:] = 100
+    pair['genes'][GENE_NAMES.index('energy_efficiency')] = 1.0
+    food = [{'id': 0, 'x': 0.5, 'y': 0.5, 'size': 3.0, 'energy': 20.0, 'consumed': False}]
+    for engine in ('python', 'numpy'):
+        assert feed(engine, pair, food) == ([150.0, 150.0], [True])
+    
+    # Плотная популяция и много пищи: оба движка дают одинаковую энергию
+    n, food_count = 400, 150
+    columns = population(rng, n, 100)
+    food = [{'id': i, 'x': fx, 'y': fy, 'size': size, 'energy': energy, 'consumed': False}
+            for i, (fx, fy, size, energy) in enumerate(zip(
+                rng.uniform(0, 100, food_count).tolist(), rng.uniform(0, 100, food_count).tolist(),
+                rng.uniform(2, 5, food_count).tolist(), rng.uniform(10, 25, food_count).tolist()))]
+    results = [feed(engine, columns, food) for engine in ('python', 'numpy')]
+    fed = sum(a != b for a, b in zip(results[0][0], columns['energy'].tolist()))
+    print(f"Поели {fed} из {n}, съедено {sum(results[0][1])} из {food_count}")
+    assert fed > sum(results[0][1]) > 0
+    assert results[0] == results[1]
+
 if __name__ == "__main__":
     try:
         test_basic_simulation()
         test_organism_genetics()
         test_evolution_trends()
+        test_spatial_index_matches_full_scan()
+        test_numpy_engine()
+        test_vectorized_mutation()
+        test_gene_history_ring_buffer()
+        test_snapshots()
+        test_step_scheduler()
+        test_running_stats_match_rescan()
+        test_raster_renderer()
+        test_substeps()
+        test_headless_runner()
+        test_parameter_sweep()
+        test_benchmark_suite()
+        test_phase_timers()
+        test_checkpoint()
+        test_seeded_streams()
+        test_pairwise_interactions()
+        test_compact_organism()
+        test_top_k()
+        test_fitness_rank()
+        test_nearest_organism()
+        test_organism_lookup()
+        test_in_place_compaction()
+        test_feeding_rule()
         print("\n✅ Все тесты прошли успешно!")
         
     except Exception as e: